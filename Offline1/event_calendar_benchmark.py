@@ -0,0 +1,68 @@
+'''
+Benchmark of the future event list: the linear scan over a time_next_event
+array (as timing() used to do) against the heap-based EventCalendar and the
+LinearCalendar (the same scan behind the calendar interface).
+
+Every model has num_types event types with one pending event each.  Each
+step removes the earliest event and reschedules it an exponential time
+later, so the list always holds num_types events.
+'''
+
+import math
+import time
+
+import os
+import sys
+
+# the shared simulation kernel (simkernel) is in the repository root
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from simkernel import Lcgrand, EventCalendar, LinearCalendar
+
+NUM_TYPES = [2, 4, 10, 100, 1000, 10000]
+
+# number of events processed per run; fewer for the big linear scans
+def num_steps(num_types):
+    return max(2000, 2000000 // num_types)
+
+
+def run_linear(num_types, steps):
+    lcg = Lcgrand()
+    time_next_event = [0.0] + [-math.log(lcg.lcgrand(1)) for _ in range(num_types)]
+    start = time.perf_counter()
+    for _ in range(steps):
+        min_time_next_event = 1.0e+29
+        next_event_type = 0
+        for i in range(1, num_types + 1):
+            if time_next_event[i] < min_time_next_event:
+                min_time_next_event = time_next_event[i]
+                next_event_type = i
+        time_next_event[next_event_type] = min_time_next_event - math.log(lcg.lcgrand(1))
+    return time.perf_counter() - start
+
+
+def run_calendar(calendar, num_types, steps):
+    lcg = Lcgrand()
+    for i in range(1, num_types + 1):
+        calendar.schedule(-math.log(lcg.lcgrand(1)), i)
+    start = time.perf_counter()
+    for _ in range(steps):
+        event = calendar.pop()
+        calendar.reschedule(event, event.time - math.log(lcg.lcgrand(1)))
+    return time.perf_counter() - start
+
+
+def main():
+    print("%8s %10s %18s %18s %18s %9s" % ("types", "events", "linear (us/event)", "heap (us/event)", "LinearCalendar", "speedup"))
+    for num_types in NUM_TYPES:
+        steps = num_steps(num_types)
+        linear = run_linear(num_types, steps) / steps * 1e6
+        heap = run_calendar(EventCalendar(), num_types, steps) / steps * 1e6
+        linear_calendar = run_calendar(LinearCalendar(num_types), num_types, steps) / steps * 1e6
+        print("%8d %10d %18.3f %18.3f %18.3f %9.1f" % (num_types, steps, linear, heap, linear_calendar, linear / heap))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# Event tracing for the single-server queueing simulation.
+#
+# SingleServerQueue reports three kinds of records to its trace: a customer
+# arrival, a customer departure, and the start of service of a customer who
+# waited (one more completed delay).  With trace=None the model skips these
+# calls entirely, so production runs pay nothing for tracing.
+#
+# TextTrace writes the event_orders.txt format through an in-memory buffer.
+# BinaryTrace writes fixed-size records that load_trace() maps back as a
+# NumPy record array without reading the whole file.
+
+import os
+
+import numpy as np
+
+# record types of a trace
+ARRIVAL = 1
+DEPARTURE = 2
+DELAY = 3
+
+# layout of one record of a binary trace: event index, record type,
+# customer number (number of customers delayed for DELAY records), time
+RECORD_DTYPE = np.dtype([('event', '<u8'), ('type', 'u1'), ('customer', '<u8'), ('time', '<f8')])
+
+
+class TextTrace:
+    def __init__(self, path, buffer_size=4096):
+        self.file = open(path, 'w')
+        self.buffer = []                    # lines not yet written
+        self.buffer_size = buffer_size      # number of lines written at once
+
+    def arrival(self, event, customer, time):
+        self.buffer.append('%d. Next event: Customer %d Arrival\n' % (event, customer))
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def departure(self, event, customer, time):
+        self.buffer.append('%d. Next event: Customer %d Departure\n' % (event, customer))
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def delay(self, event, num_delayed, time):
+        self.buffer.append('\n---------No. of customers delayed: %d--------\n\n' % num_delayed)
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        self.file.write(''.join(self.buffer))
+        self.buffer = []
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class BinaryTrace:
+    def __init__(self, path, buffer_size=65536):
+        self.file = open(path, 'wb')
+        self.buffer = []                    # records not yet written
+        self.buffer_size = buffer_size      # number of records written at once
+
+    def arrival(self, event, customer, time):
+        self.buffer.append((event, ARRIVAL, customer, time))
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def departure(self, event, customer, time):
+        self.buffer.append((event, DEPARTURE, customer, time))
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def delay(self, event, num_delayed, time):
+        self.buffer.append((event, DELAY, num_delayed, time))
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        np.array(self.buffer, dtype=RECORD_DTYPE).tofile(self.file)
+        self.buffer = []
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# map a binary trace into memory as a record array
+def load_trace(path):
+    # an empty file cannot be mapped
+    if os.path.getsize(path) == 0:
+        return np.empty(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode='r')
+
+
+# rewrite a binary trace in the event_orders.txt format
+def binary_to_text(binary_path, text_path):
+    records = load_trace(binary_path)
+    with TextTrace(text_path) as trace:
+        for event, record_type, customer, time in records.tolist():
+            if record_type == ARRIVAL:
+                trace.arrival(event, customer, time)
+            elif record_type == DEPARTURE:
+                trace.departure(event, customer, time)
+            else:
+                trace.delay(event, customer, time)
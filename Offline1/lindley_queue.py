@@ -0,0 +1,120 @@
+'''
+Fast path of the single server queueing system without an event loop.
+
+With FIFO service the delay of customer i + 1 follows from the Lindley recursion
+
+    D(i+1) = max(0, D(i) + S(i) - X(i+1))
+
+where S(i) is the service time of customer i and X(i+1) the time between the
+arrivals of customers i and i + 1. Written as a random walk
+P(j) = D(0) + Y(1) + ... + Y(j), with Y(j) = S(j-1) - X(j), it is
+
+    D(j) = P(j) - min(0, P(1), ..., P(j))
+
+which numpy computes for a whole chunk of customers at once with cumsum and
+minimum.accumulate. The other measures follow from the delays. The run ends
+when customer N starts service, at T = a(N) + D(N). Before T the queue holds
+every delay of customers 1..N and the customers that arrived after N but
+before T, and the server was busy for the services of customers 1..N-1.
+
+The random numbers are the ones SingleServerQueue(arrival_stream,
+service_stream) uses, so the Result is that of the event-driven run up to
+rounding (about 1e-12 relative), and the streams are left where it leaves
+them. The two streams must differ: with a shared stream the order of the
+draws depends on the order of the events.
+
+    LindleyQueue(arrival_stream=1, service_stream=2).run((1.0, 0.5, 10 ** 7))
+'''
+
+# the shared simulation kernel (simkernel) is in the repository root
+import os
+import sys
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+import numpy as np
+
+from simkernel import Lcgrand
+
+# input parameters and measures of performance of the event-driven model
+from single_server_queueing_system import Params, Result
+
+# customers per chunk; the arrays of a chunk take about 50 bytes per customer
+CHUNK_SIZE = 2 ** 20
+
+
+class LindleyQueue:
+    def __init__(self, lcg=None, arrival_stream=1, service_stream=2, chunk_size=CHUNK_SIZE):
+        self.lcg = lcg if lcg is not None else Lcgrand()    # random number streams
+        if arrival_stream % len(self.lcg.zrng) == service_stream % len(self.lcg.zrng):
+            raise ValueError('the Lindley recursion needs different arrival and service streams')
+        self.arrival_stream = arrival_stream    # stream of the inter-arrival times
+        self.service_stream = service_stream    # stream of the service times
+        self.chunk_size = chunk_size            # customers per vectorized step
+
+    def __expon__(self, mean, stream, n):
+        # the next n exponential variates of the stream, as in Simulation.__expon__
+        return -mean * np.log(self.lcg.lcgrand_block(stream, n))
+
+    def run(self, params):
+        mean_interarrival, mean_service, num_delays_required = Params(*params)
+        arrival_seed = self.lcg.lcgrandgt(self.arrival_stream)
+        service_seed = self.lcg.lcgrandgt(self.service_stream)
+
+        delay = 0.0             # delay of the last customer of the previous chunk
+        service = 0.0           # service time of the last customer of the previous chunk
+        time_arrival = 0.0      # arrival time of the last customer of the previous chunk
+        total_of_delays = 0.0
+        busy_time = 0.0         # sum of the service times of all but the last customer
+        num_custs = 0
+        while num_custs < num_delays_required:
+            n = min(self.chunk_size, num_delays_required - num_custs)
+            interarrivals = self.__expon__(mean_interarrival, self.arrival_stream, n)
+            services = self.__expon__(mean_service, self.service_stream, n)
+
+            # arrival times, summed one by one like the simulation clock
+            arrivals = np.cumsum(np.concatenate(([time_arrival], interarrivals)))[1:]
+
+            # random walk of the chunk and its delays
+            steps = np.concatenate(([service], services[:-1])) - interarrivals
+            walk = delay + np.cumsum(steps)
+            delays = walk - np.minimum(np.minimum.accumulate(walk), 0.0)
+
+            total_of_delays += delays.sum()
+            busy_time += service + services[:-1].sum()
+            delay, service, time_arrival = delays[-1], services[-1], arrivals[-1]
+            num_custs += n
+
+        # Customer N starts service at the end of the run; the customers who
+        # arrived before that wait in queue until then.
+        sim_time = time_arrival + delay
+        area_num_in_q = total_of_delays
+        num_arrivals = num_custs + 1    # the event run also drew the arrival after the last one processed
+        block = 64
+        while True:
+            arrivals = time_arrival + np.cumsum(self.__expon__(mean_interarrival, self.arrival_stream, block))
+            waiting = arrivals[arrivals < sim_time]
+            area_num_in_q += (sim_time - waiting).sum()
+            if waiting.size < block:
+                num_arrivals += waiting.size
+                break
+            num_arrivals += block
+            time_arrival = arrivals[-1]
+            block *= 2
+
+        # leave the streams after the numbers the event-driven run draws
+        self.lcg.lcgrandst(arrival_seed, self.arrival_stream)
+        self.lcg.lcgrand_skip(self.arrival_stream, num_arrivals)
+        self.lcg.lcgrandst(service_seed, self.service_stream)
+        self.lcg.lcgrand_skip(self.service_stream, num_custs)
+
+        return Result(float(total_of_delays / num_custs), float(area_num_in_q / sim_time), float(busy_time / sim_time), float(sim_time))
+
+
+# run one point of a parameter sweep (see sweep_runner.py) with the fast
+# path; point holds the Params fields and seeds the Lcgrand seeds of the run
+def run_point(point, seeds):
+    lcg = Lcgrand()
+    lcg.zrng = list(seeds)
+    return LindleyQueue(lcg).run(Params(**point))._asdict()
@@ -0,0 +1,183 @@
+'''
+Multi-server queueing stations (M/M/c) and networks of such stations.
+
+Every station has num_servers parallel servers and one FIFO queue shared by
+all customer classes. Each class has its own external arrival stream and
+entry station, and after service at a station a class is routed to another
+station or leaves the network. A one-station, one-server network is
+exactly the single-server model of single_server_queueing_system.py: it
+draws the same random numbers in the same order and reproduces its results.
+'''
+
+# constants to be used as event types
+ARRIVAL = 1
+DEPARTURE = 2
+
+# the shared simulation kernel (simkernel) is in the repository root
+import os
+import sys
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+# import the simulation kernel
+from simkernel import Simulation, TimeWeighted
+
+from collections import deque, namedtuple
+
+# a customer class: external arrivals with mean_interarrival join entry_station
+CustomerClass = namedtuple('CustomerClass', ['mean_interarrival', 'entry_station'])
+
+# a station with num_servers parallel servers; mean_service[k] is the mean
+# service time of class k, and routing[k] is a list of (station, probability)
+# pairs for class k after service here (the leftover probability leaves)
+Station = namedtuple('Station', ['num_servers', 'mean_service', 'routing'])
+
+# estimated measures of performance of one station
+StationResult = namedtuple('StationResult', ['avg_delay', 'avg_num_in_q', 'server_utilization', 'num_custs_delayed'])
+
+# estimated measures of performance of the whole network
+NetworkResult = namedtuple('NetworkResult', ['stations', 'avg_delay_by_class', 'sim_time'])
+
+
+class StationState:
+    def __init__(self, station):
+        self.num_servers = station.num_servers
+        self.mean_service = station.mean_service
+        self.idle_servers = list(range(station.num_servers - 1, -1, -1))    # stack of idle server indices
+        self.num_busy = 0                   # number of busy servers
+        self.queue = deque()                # (arrival time, class) of the customers in queue
+        self.time_last_event = 0.0          # time of the last change of this station
+
+        self.num_custs_delayed = 0          # number of customers who completed their delay here
+        self.total_of_delays = 0.0          # sum of the delays in queue here
+        self.num_in_q_stat = TimeWeighted()     # area under the number-in-queue function
+        self.num_busy_stat = TimeWeighted()     # area under the number-of-busy-servers function
+
+        # cumulative routing probabilities per class: [(cumulative probability, station)]
+        self.routes = []
+        for routing in station.routing:
+            cumulative = 0.0
+            route = []
+            for next_station, probability in routing:
+                cumulative += probability
+                route.append((cumulative, next_station))
+            self.routes.append(route)
+
+    def update_time_avg_stats(self, sim_time):
+        # only this station changes, so only its areas need updating
+        time_since_last_event = sim_time - self.time_last_event
+        self.time_last_event = sim_time
+        self.num_in_q_stat.update(len(self.queue), time_since_last_event)
+        self.num_busy_stat.update(self.num_busy, time_since_last_event)
+
+
+class QueueingNetwork(Simulation):
+    # constructor; the clock, calendar, streams and event loop are the kernel's.
+    # The time averages are kept per station (StationState), since an event
+    # only changes one station.
+    def __init__(self, stations, classes, lcg=None, calendar=None, profiler=None):
+        Simulation.__init__(self, lcg, calendar, profiler)
+        self.stations = stations            # list of Station
+        self.classes = classes              # list of CustomerClass
+
+        self.states = []                    # StationState of every station
+        self.num_custs_delayed = 0          # delays completed over all stations
+        self.num_delays_required = 0        # number of delays to complete before stopping
+        self.total_of_delays_by_class = [0.0] * len(classes)
+        self.num_delays_by_class = [0] * len(classes)
+
+    def __initialize__(self):
+        self.__reset_clock__()
+        self.states = [StationState(station) for station in self.stations]
+        self.num_custs_delayed = 0
+        self.total_of_delays_by_class = [0.0] * len(self.classes)
+        self.num_delays_by_class = [0] * len(self.classes)
+
+        # schedule the first external arrival of every class
+        for k, customer_class in enumerate(self.classes):
+            self.calendar.schedule(self.sim_time + self.__expon__(customer_class.mean_interarrival), ARRIVAL, k)
+
+    def __start_service__(self, index, state, customer_class, delay):
+        # record the delay and put the customer on an idle server
+        state.total_of_delays += delay
+        state.num_custs_delayed += 1
+        self.num_custs_delayed += 1
+        self.total_of_delays_by_class[customer_class] += delay
+        self.num_delays_by_class[customer_class] += 1
+
+        server = state.idle_servers.pop()
+        state.num_busy += 1
+        self.calendar.schedule(self.sim_time + self.__expon__(state.mean_service[customer_class]), DEPARTURE, (index, server, customer_class))
+
+    def __join__(self, index, customer_class):
+        # a customer arrives at a station, from outside or from another station
+        state = self.states[index]
+        state.update_time_avg_stats(self.sim_time)
+        if state.idle_servers:
+            self.__start_service__(index, state, customer_class, 0.0)
+        else:
+            state.queue.append((self.sim_time, customer_class))
+
+    def __handlers__(self):
+        return {ARRIVAL: ('arrival', self.__on_arrival__), DEPARTURE: ('departure', self.__on_departure__)}
+
+    def __finished__(self):
+        # Run the simulation while more delays (over all stations) are still needed.
+        return self.num_custs_delayed >= self.num_delays_required
+
+    def __watches__(self):
+        return {'customers_in_queue': lambda: sum(len(state.queue) for state in self.states)}
+
+    def __on_arrival__(self):
+        self.__arrive__(self.event_data)
+
+    def __on_departure__(self):
+        self.__depart__(*self.event_data)
+
+    def __arrive__(self, customer_class):
+        # Schedule next arrival of this class, then let the customer join its entry station.
+        self.calendar.schedule(self.sim_time + self.__expon__(self.classes[customer_class].mean_interarrival), ARRIVAL, customer_class)
+        self.__join__(self.classes[customer_class].entry_station, customer_class)
+
+    def __depart__(self, index, server, customer_class):
+        state = self.states[index]
+        state.update_time_avg_stats(self.sim_time)
+
+        # free the server, and give it to the first customer in queue (if any)
+        state.idle_servers.append(server)
+        state.num_busy -= 1
+        if state.queue:
+            time_arrival, next_class = state.queue.popleft()
+            self.__start_service__(index, state, next_class, self.sim_time - time_arrival)
+
+        # route the departing customer
+        if customer_class < len(state.routes) and state.routes[customer_class]:
+            u = self.__random__(1)
+            for cumulative, next_station in state.routes[customer_class]:
+                if u <= cumulative:
+                    self.__join__(next_station, customer_class)
+                    break
+
+    def __report__(self):
+        for state in self.states:
+            state.update_time_avg_stats(self.sim_time)
+        stations = [StationResult(state.total_of_delays / state.num_custs_delayed if state.num_custs_delayed else 0.0,
+                                  state.num_in_q_stat.mean(self.sim_time),
+                                  state.num_busy_stat.mean(state.num_servers * self.sim_time),
+                                  state.num_custs_delayed)
+                    for state in self.states]
+        avg_delay_by_class = [total / count if count else 0.0
+                              for total, count in zip(self.total_of_delays_by_class, self.num_delays_by_class)]
+        return NetworkResult(stations, avg_delay_by_class, self.sim_time)
+
+    def run(self, num_delays_required):
+        self.num_delays_required = num_delays_required
+        self.__initialize__()
+        self.__run_events__()
+        return self.__report__()
+
+
+# an M/M/c station fed by a single class of customers
+def mmc_queue(mean_interarrival, mean_service, num_servers, lcg=None):
+    return QueueingNetwork([Station(num_servers, [mean_service], [[]])], [CustomerClass(mean_interarrival, 0)], lcg)
@@ -8,8 +8,9 @@ Theory can be found from the book of "Simulation Modeling and Analysis" by Averi
 IDLE = 0
 BUSY = 1
 
-# queue limit
-Q_LIMIT = 100
+# constants to be used as event types
+ARRIVAL = 1
+DEPARTURE = 2
 
 # input file name
 INPUT_FILE_NAME = 'in.txt'
@@ -19,260 +20,391 @@ OUTPUT_FILE_NAME = 'results.txt'
 
 EVENT_LOG = 'event_orders.txt'
 
-output_file = None
-event_log = None
-
-# import the random number generator
-from lcg_rand import Lcgrand
-
-# import math
-import math
-
-# global variables
-next_event_type = num_custs_delayed = num_delays_required = num_events = num_in_q = 0
-server_status = IDLE
-area_num_in_q = area_server_status = mean_interarrival = mean_service = sim_time = time_last_event = total_of_delays = 0.0
-time_arrival = [0.0] * (Q_LIMIT + 1)
-time_next_event = [0.0] * 3
-num_custs_arrived = 0
-num_custs_departed = 0
-event_count = 0
-lcg = Lcgrand()
-
-# expon function
-def expon(mean):
-    global lcg
-    return -mean * math.log(lcg.lcgrand(1))
-        
-# init function of the simulation
-def initialize():
-    global sim_time, server_status, num_in_q, time_last_event
-    global num_custs_delayed, total_of_delays, area_num_in_q, area_server_status
-    global time_next_event, mean_interarrival
-    global num_custs_arrived, num_custs_departed
-
-    # Initialize the simulation clock.
-    sim_time = 0.0
-
-    # Initialize the state variables.
-    server_status = IDLE
-    num_in_q = 0
-    time_last_event = 0.0
-
-    # Initialize the statistical counters.
-    num_custs_delayed = 0
-    num_custs_arrived = 0
-    num_custs_departed = 0
-    total_of_delays = 0.0
-    area_num_in_q = 0.0
-    area_server_status = 0.0
-
-    # Initialize event list. Since no customers are present, the departure
-    # (service completion) event is eliminated from consideration.
-    time_next_event = [0, sim_time + expon(mean_interarrival), 1.0e+30]
-    
-# timing function for the simulation
-def timing():
-    global sim_time, time_next_event, num_events, next_event_type, event_count
-    
-    min_time_next_event = 1.0e+29
-    next_event_type = 0
-    
-    # Determine the event type of the next event to occur.
-    for i in range(1, num_events + 1):
-        if (time_next_event[i] < min_time_next_event):
-            min_time_next_event = time_next_event[i]
-            next_event_type = i
-    
-    
-    # Check to see whether the event list is empty.
-    if next_event_type == 0:
-        # The event list is empty, so stop the simulation.
-        print('Event list empty at time ' + str(sim_time))
-        exit(1)
-    
-    # The event list is not empty, so advance the simulation clock.
-    sim_time = min_time_next_event
-    event_count += 1
-    
-    
-# arrival event function for the simulation
-def arrive():
-    global sim_time, time_next_event, mean_interarrival, server_status, num_in_q, Q_LIMIT, time_arrival, total_of_delays, num_custs_delayed, mean_service
-    
-    global event_log, event_count
-    global num_custs_arrived
-
-    # Schedule next arrival.
-    time_next_event[1] = sim_time + expon(mean_interarrival)
-    
-    # increment the number of customers arrived
-    num_custs_arrived += 1
-    
-    # log the event
-    event_log.write(str(event_count) + '. Next event: Customer ' + str(num_custs_arrived) + ' Arrival\n' )
-    
-
-    # Check to see whether server is busy.
-    if (server_status == BUSY):
-        # Server is busy, so increment number of customers in queue.
-        num_in_q += 1
-
-        # Check to see whether an overflow condition exists.
-        if num_in_q > Q_LIMIT:
-            # The queue has overflowed, so stop the simulation.
-            print("\nOverflow of the array time_arrival at time", sim_time)
-            exit(2)
-
-        # There is still room in the queue, so store the time of arrival of the arriving customer at the (new) end of time_arrival.
-        time_arrival[num_in_q] = sim_time
-    else:
-        # Server is idle, so arriving customer has a delay of zero.
-        delay = 0.0
-        total_of_delays += delay
-
-        # Increment the number of customers delayed, and make server busy.
-        num_custs_delayed += 1
-        
-        # log the event
-        event_log.write('\n---------No. of customers delayed: ' + str(num_custs_delayed) + '--------\n\n')
-        server_status = BUSY
-
-        # Schedule a departure (service completion).
-        time_next_event[2] = sim_time + expon(mean_service)
-        
-    
-# departure event function for the simulation
-def depart():
-    global sim_time, num_in_q, server_status, time_next_event, time_arrival, total_of_delays, num_custs_delayed, mean_service
-    
-    global event_log, event_count
-    global num_custs_departed
-    
-    # increment the number of customers departed
-    num_custs_departed += 1
-    
-    # log the event
-    event_log.write(str(event_count) + '. Next event: Customer ' + str(num_custs_departed) + ' Departure\n' )
-
-    # Check to see whether the queue is empty.
-    if num_in_q == 0:
-        # The queue is empty so make the server idle and eliminate the departure (service completion) event from consideration.
-        server_status = IDLE
-        time_next_event[2] = 1.0e+30
-    else:
-        # The queue is nonempty, so decrement the number of customers in queue.
-        num_in_q -= 1
-
-        # Compute the delay of the customer who is beginning service and update the total delay accumulator.
-        delay = sim_time - time_arrival[1]
-        total_of_delays += delay
-
-        # Increment the number of customers delayed, and schedule departure.
-        num_custs_delayed += 1
-        
-        # log the event
-        event_log.write('\n---------No. of customers delayed: ' + str(num_custs_delayed) + '--------\n\n')
-        
-        time_next_event[2] = sim_time + expon(mean_service)
-
-        # Move each customer in queue (if any) up one place.
-        for i in range(1, num_in_q + 1):
-            time_arrival[i] = time_arrival[i + 1]
-
-
-
-# report function for the simulation
-def report():
-    global total_of_delays, num_custs_delayed, area_num_in_q, sim_time, area_server_status
-    
-    global output_file
-
-    # Compute and write estimates of desired measures of performance. to the output file
-    output_file.write("\nAvg delay in queue: {:.6f} minutes\n".format(total_of_delays / num_custs_delayed))
-    output_file.write("Avg number in queue: {:.6f}\n".format(area_num_in_q / sim_time))
-    output_file.write("Server utilization: {:.6f}\n".format(area_server_status / sim_time))
-    output_file.write("Time simulation ended: {:.6f} minutes".format(sim_time))
-    
-# update_time_avg_stats function for the simulation
-def update_time_avg_stats():
-    global sim_time, time_last_event, area_num_in_q, area_server_status, num_in_q, server_status
-
-    # Compute time since last event, and update last-event-time marker.
-    time_since_last_event = sim_time - time_last_event
-    time_last_event = sim_time
-
-    # Update area under number-in-queue function.
-    area_num_in_q += num_in_q * time_since_last_event
-
-    # Update area under server-busy indicator function.
-    area_server_status += server_status * time_since_last_event
-    
-    
-# function to print all the global variables
-def print_globals():
-    print('sim_time: ' + str(sim_time))
-    print('server_status: ' + str(server_status))
-    print('num_in_q: ' + str(num_in_q))
-    print('time_last_event: ' + str(time_last_event))
-    print('num_custs_delayed: ' + str(num_custs_delayed))
-    print('total_of_delays: ' + str(total_of_delays))
-    print('area_num_in_q: ' + str(area_num_in_q))
-    print('area_server_status: ' + str(area_server_status))
-    print('time_next_event: ' + str(time_next_event))
-    print('mean_interarrival: ' + str(mean_interarrival))
-    print('mean_service: ' + str(mean_service))
-    print('num_delays_required: ' + str(num_delays_required))
-    print('next_event_type: ' + str(next_event_type))
-    exit(1)
-    
-# main function of the simulation
-def main():
-    global num_events, mean_interarrival, mean_service, num_delays_required, num_custs_delayed, next_event_type
-    
-    global output_file, event_log
+# the shared simulation kernel (simkernel) is in the repository root
+import os
+import sys
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+# import the simulation kernel and the random number generator
+from simkernel import Simulation, TimeWeighted, Lcgrand, LinearCalendar, load_checkpoint
+
+# import the distribution accumulators
+from simkernel import TimeWeightedHistogram, Histogram, Tally
+
+# import the event trace sinks
+from event_trace import TextTrace
+
+# import the batch-means confidence intervals and the warm-up detection
+from simkernel.output_analysis import BatchMeans, SequentialStop, MserWarmup
+
+# FIFO queue of arrival times with O(1) append and popleft
+from collections import deque
+
+from collections import namedtuple
+
+# input parameters of one simulation run
+Params = namedtuple('Params', ['mean_interarrival', 'mean_service', 'num_delays_required'])
+
+# estimated measures of performance of one simulation run
+Result = namedtuple('Result', ['avg_delay', 'avg_num_in_q', 'server_utilization', 'sim_time'])
+
+
+class SingleServerQueue(Simulation):
+    # attributes that are not part of a checkpoint
+    TRANSIENT = Simulation.TRANSIENT + ('trace',)
+
+    # names of the values returned by __levels__
+    LEVELS = ('num_in_q', 'server_status')
+
+    # constructor; the clock, calendar, streams and event loop are the kernel's.
+    # By default inter-arrival and service times share stream 1 like the
+    # original program; separate streams give every customer the same times
+    # whatever the order of the events (see lindley_queue.py).  With one
+    # arrival and at most one departure pending, the default calendar is the
+    # linear scan of the original program.
+    def __init__(self, lcg=None, trace=None, profiler=None, calendar=None, arrival_stream=1, service_stream=1):
+        Simulation.__init__(self, lcg, calendar if calendar is not None else LinearCalendar(DEPARTURE), profiler)
+        self.trace = trace                  # event trace sink (None: no tracing)
+        self.arrival_stream = arrival_stream    # stream of the inter-arrival times
+        self.service_stream = service_stream    # stream of the service times
+
+        self.mean_interarrival = 0.0        # mean inter-arrival time
+        self.mean_service = 0.0             # mean service time
+        self.num_delays_required = 0        # number of customers to delay before stopping
+
+        self.server_status = IDLE           # server state
+        self.num_in_q = 0                   # number of customers in queue
+        self.time_arrival = deque()         # arrival times of the customers in queue
+
+        self.num_custs_delayed = 0          # number of customers who completed their delay
+        self.num_custs_arrived = 0          # number of customers arrived
+        self.num_custs_departed = 0         # number of customers departed
+        self.total_of_delays = 0.0          # sum of the delays in queue
+        self.num_in_q_stat = TimeWeighted()         # area under the number-in-queue function
+        self.server_status_stat = TimeWeighted()    # area under the server-busy indicator function
+        self.accumulators = [self.num_in_q_stat, self.server_status_stat]
+        self.delay_observers = []           # objects whose add(delay) gets every delay, e.g. a Tally
+        self.delay_tally = None             # Tally of the delays, also in delay_observers (None: no distributions collected)
+        self.warmup = None                  # MserWarmup on the delays, also in delay_observers (None: no warm-up detection)
+
+        self.delay_batches = None           # batch means of the delays (sequential mode only)
+        self.stop = None                    # stopping rule on the delay batch means
+        self.precision_reached = False      # set once the stopping rule is satisfied
+
+    @classmethod
+    def from_checkpoint(cls, path, trace=None, profiler=None):
+        # a queue in the state saved at path; resume() continues its run
+        queue = cls(trace=trace, profiler=profiler)
+        queue.__restore__(load_checkpoint(path))
+        return queue
+
+    # keep the time-weighted distribution of the number in queue and the
+    # distribution of the delays (histogram and P² quantiles) from now on;
+    # a second call replaces the statistics of the first one
+    def collect_distributions(self, max_queue_length=100, max_delay=50.0, num_delay_bins=100, quantiles=(0.5, 0.9, 0.99)):
+        self.num_in_q_stat = TimeWeightedHistogram(Histogram(0, max_queue_length + 1, max_queue_length + 1, discrete=True), quantiles)
+        self.accumulators = [self.num_in_q_stat, self.server_status_stat]
+        if self.delay_tally is not None:
+            self.delay_observers.remove(self.delay_tally)
+        self.delay_tally = Tally(Histogram(0.0, max_delay, num_delay_bins), quantiles)
+        self.delay_observers.append(self.delay_tally)
+
+    # the distributions of the last run, as a dict
+    def distributions(self):
+        if self.delay_tally is None:
+            raise RuntimeError('no distributions: collect_distributions() was not called before the run')
+        return {'queue_length': self.num_in_q_stat.summary(self.sim_time - self.num_in_q_stat.start_time), 'delay': self.delay_tally.summary()}
+
+    # detect the end of the initial transient from the delays (MSER with
+    # batches of batch_size delays) during the following runs; when it is
+    # found every statistic restarts, and the run goes on for
+    # num_delays_required more delays
+    def detect_warmup(self, batch_size=5, min_batches=20, capacity=1000):
+        if self.warmup is not None:
+            self.delay_observers.remove(self.warmup)
+        self.warmup = MserWarmup(batch_size, min_batches, capacity)
+        self.delay_observers.insert(0, self.warmup)
+
+    # the warm-up of the last run: the MSER truncation point and the number of
+    # delays and the time deleted (None while no steady state was detected)
+    def warmup_summary(self):
+        summary = self.warmup.summary()
+        summary['time'] = self.num_in_q_stat.start_time if self.warmup.detected else None
+        return summary
+
+    @property
+    def area_num_in_q(self):
+        return self.num_in_q_stat.area
+
+    @property
+    def area_server_status(self):
+        return self.server_status_stat.area
+
+    def __initialize__(self):
+        # Initialize the simulation clock, the event list and the time-weighted accumulators.
+        self.__reset_clock__()
+
+        # Initialize the state variables.
+        self.server_status = IDLE
+        self.num_in_q = 0
+        self.time_arrival = deque()
+
+        # Initialize the statistical counters.
+        self.num_custs_delayed = 0
+        self.num_custs_arrived = 0
+        self.num_custs_departed = 0
+        self.event_count = 0
+        self.total_of_delays = 0.0
+        self.precision_reached = False
+        for observer in self.delay_observers:
+            observer.reset()
+
+        # Initialize event list. Since no customers are present, only the first
+        # arrival is scheduled; no departure (service completion) is pending.
+        self.calendar.schedule(self.sim_time + self.__expon__(self.mean_interarrival, self.arrival_stream), ARRIVAL)
+
+    def __handlers__(self):
+        return {ARRIVAL: ('arrival', self.__arrive__), DEPARTURE: ('departure', self.__depart__)}
+
+    def __levels__(self):
+        return (self.num_in_q, self.server_status)
+
+    def __time_avg_updater__(self):
+        # the histogram of collect_distributions() needs the generic update
+        if type(self.num_in_q_stat) is TimeWeighted:
+            return self.__update_areas__
+        return Simulation.__time_avg_updater__(self)
+
+    def __update_areas__(self):
+        # Compute time since last event, and update last-event-time marker.
+        time_since_last_event = self.sim_time - self.time_last_event
+        self.time_last_event = self.sim_time
+
+        # Update area under number-in-queue function.
+        self.num_in_q_stat.area += self.num_in_q * time_since_last_event
+
+        # Update area under server-busy indicator function.
+        self.server_status_stat.area += self.server_status * time_since_last_event
+
+    def __finished__(self):
+        # Run the simulation while more delays are still needed.
+        return self.num_custs_delayed >= self.num_delays_required or self.precision_reached
+
+    def __watches__(self):
+        return {'queue_length': lambda: self.num_in_q}
+
+    def __instrument__(self, profiler):
+        Simulation.__instrument__(self, profiler)
+        self.trace = profiler.instrument_trace(self.trace)
+
+    def __uninstrument__(self):
+        Simulation.__uninstrument__(self)
+        self.trace = self.trace.trace if self.trace is not None else None
+
+    def __arrive__(self):
+        # Schedule next arrival.
+        self.calendar.schedule(self.sim_time + self.__expon__(self.mean_interarrival, self.arrival_stream), ARRIVAL)
+
+        # increment the number of customers arrived
+        self.num_custs_arrived += 1
 
-    # Specify the number of events for the timing function.
-    num_events = 2
+        # log the event
+        if self.trace is not None:
+            self.trace.arrival(self.event_count, self.num_custs_arrived, self.sim_time)
+
+        # Check to see whether server is busy.
+        if self.server_status == BUSY:
+            # Server is busy, so increment number of customers in queue.
+            self.num_in_q += 1
+
+            # Store the time of arrival of the arriving customer at the end of time_arrival.
+            self.time_arrival.append(self.sim_time)
+        else:
+            # Server is idle, so arriving customer has a delay of zero.
+            delay = 0.0
+            self.total_of_delays += delay
+            if self.delay_batches is not None:
+                self.__record_delay__(delay)
+            if self.delay_observers:
+                self.__observe_delay__(delay)
+
+            # Increment the number of customers delayed, and make server busy.
+            self.num_custs_delayed += 1
+
+            # log the event
+            if self.trace is not None:
+                self.trace.delay(self.event_count, self.num_custs_delayed, self.sim_time)
+            self.server_status = BUSY
+
+            # Schedule a departure (service completion).
+            self.calendar.schedule(self.sim_time + self.__expon__(self.mean_service, self.service_stream), DEPARTURE)
+
+    def __depart__(self):
+        # increment the number of customers departed
+        self.num_custs_departed += 1
 
-    # Read input parameters. from the input file
-    with open(INPUT_FILE_NAME, 'r') as input_file:
+        # log the event
+        if self.trace is not None:
+            self.trace.departure(self.event_count, self.num_custs_departed, self.sim_time)
+
+        # Check to see whether the queue is empty.
+        if self.num_in_q == 0:
+            # The queue is empty so make the server idle; no departure (service completion) is scheduled.
+            self.server_status = IDLE
+        else:
+            # The queue is nonempty, so decrement the number of customers in queue.
+            self.num_in_q -= 1
+
+            # Compute the delay of the customer who is beginning service and update the total delay accumulator.
+            delay = self.sim_time - self.time_arrival.popleft()
+            self.total_of_delays += delay
+            if self.delay_batches is not None:
+                self.__record_delay__(delay)
+            if self.delay_observers:
+                self.__observe_delay__(delay)
+
+            # Increment the number of customers delayed, and schedule departure.
+            self.num_custs_delayed += 1
+
+            # log the event
+            if self.trace is not None:
+                self.trace.delay(self.event_count, self.num_custs_delayed, self.sim_time)
+
+            self.calendar.schedule(self.sim_time + self.__expon__(self.mean_service, self.service_stream), DEPARTURE)
+
+    def __observe_delay__(self, delay):
+        for observer in self.delay_observers:
+            if observer.add(delay) is True and observer is self.warmup:
+                # the statistics restart after this delay, so the other
+                # observers must not see it
+                self.__delete_warmup__()
+                return
+
+    def __delete_warmup__(self):
+        # Steady state: discard the statistics of the warm-up delays (this one
+        # included) and of the time so far, and delay num_delays_required more customers.
+        self.num_delays_required += self.warmup.deleted
+        self.total_of_delays = 0.0
+        self.__reset_statistics__()
+        for observer in self.delay_observers:
+            if observer is not self.warmup:
+                observer.reset()
+        if self.delay_batches is not None:
+            self.delay_batches = BatchMeans(self.delay_batches.batch_size)
+
+    def __record_delay__(self, delay):
+        # check the stopping rule every time a batch of delays is complete
+        if self.delay_batches.add(delay) and self.stop.satisfied(self.delay_batches):
+            self.precision_reached = True
+
+    def __report__(self):
+        # Compute estimates of desired measures of performance, after the
+        # warm-up period if one was deleted.
+        num_deleted = self.warmup.deleted if self.warmup is not None and self.warmup.detected else 0
+        return Result(self.total_of_delays / (self.num_custs_delayed - num_deleted),
+                      self.num_in_q_stat.time_average(self.sim_time),
+                      self.server_status_stat.time_average(self.sim_time),
+                      self.sim_time)
+
+    def print_state(self):
+        print('sim_time: ' + str(self.sim_time))
+        print('server_status: ' + str(self.server_status))
+        print('num_in_q: ' + str(self.num_in_q))
+        print('time_last_event: ' + str(self.time_last_event))
+        print('num_custs_delayed: ' + str(self.num_custs_delayed))
+        print('total_of_delays: ' + str(self.total_of_delays))
+        print('area_num_in_q: ' + str(self.area_num_in_q))
+        print('area_server_status: ' + str(self.area_server_status))
+        print('pending events: ' + str(len(self.calendar)))
+        print('mean_interarrival: ' + str(self.mean_interarrival))
+        print('mean_service: ' + str(self.mean_service))
+        print('num_delays_required: ' + str(self.num_delays_required))
+        print('next_event_type: ' + str(self.next_event_type))
+
+    # run with params; with checkpoint_path the complete state is saved there
+    # every checkpoint_interval events
+    def run(self, params, checkpoint_path=None, checkpoint_interval=1000000):
+        self.mean_interarrival, self.mean_service, self.num_delays_required = params
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+
+        # Initialize the simulation.
+        self.__initialize__()
+        return self.__simulate__()
+
+    # continue a run restored by from_checkpoint
+    def resume(self):
+        return self.__simulate__()
+
+    def __simulate__(self):
+        # Run the events until enough delays are complete.
+        self.__run_events__()
+
+        # Invoke the report generator and end the simulation.
+        return self.__report__()
+
+    # run until the batch-means confidence interval of the delay in queue has a
+    # relative half-width of at most rel_precision; num_delays_required of the
+    # params is only the upper limit. Returns the Result and the Interval.
+    def run_sequential(self, params, batch_size, rel_precision, level=0.95, min_batches=10):
+        self.delay_batches = BatchMeans(batch_size)
+        self.stop = SequentialStop(rel_precision, level, min_batches)
+        try:
+            result = self.run(params)
+            return result, self.delay_batches.interval(level)
+        finally:
+            self.delay_batches = None
+            self.stop = None
+
+
+# run one point of a parameter sweep (see sweep_runner.py); point holds the
+# Params fields and seeds the Lcgrand seeds the run starts from
+def run_point(point, seeds):
+    lcg = Lcgrand()
+    lcg.zrng = list(seeds)
+    return SingleServerQueue(lcg).run(Params(**point))._asdict()
+
+
+# read the input parameters from the input file
+def read_params(input_file_name):
+    with open(input_file_name, 'r') as input_file:
         # Read input parameters. 1 line seperated by space
-        
         mean_interarrival, mean_service, num_delays_required = map(float, input_file.readline().split())
         # convert to the num_delays_required to integer
-        num_delays_required = int(num_delays_required)
-        
-    # create the output file and event log file
-    output_file = open(OUTPUT_FILE_NAME, 'w')
-    event_log = open(EVENT_LOG, 'w')
-        
+        return Params(mean_interarrival, mean_service, int(num_delays_required))
 
-    # Write report heading and input parameters. to the output file
+
+# write the report heading and input parameters to the output file
+def write_params(output_file, params):
     output_file.write("----Single-Server Queueing System----\n\n")
-    output_file.write("Mean inter-arrival time: {:.6f} minutes\n".format(mean_interarrival))
-    output_file.write("Mean service time: {:.6f} minutes\n".format(mean_service))
-    output_file.write("Number of customers: {:d}\n".format(num_delays_required))
-    # Initialize the simulation.
-    initialize()
-        
-
-    # Run the simulation while more delays are still needed.
-    while num_custs_delayed < num_delays_required:
-        # Determine the next event.
-        timing()
-        
-        # Update time-average statistical accumulators.
-        update_time_avg_stats()
-
-        # Invoke the appropriate event function.
-        if next_event_type == 1:
-            arrive()
-        elif next_event_type == 2:
-            depart()
-
-    # Invoke the report generator and end the simulation.
-    report()
+    output_file.write("Mean inter-arrival time: {:.6f} minutes\n".format(params.mean_interarrival))
+    output_file.write("Mean service time: {:.6f} minutes\n".format(params.mean_service))
+    output_file.write("Number of customers: {:d}\n".format(params.num_delays_required))
+
+
+# write the estimates of the measures of performance to the output file
+def write_result(output_file, result):
+    output_file.write("\nAvg delay in queue: {:.6f} minutes\n".format(result.avg_delay))
+    output_file.write("Avg number in queue: {:.6f}\n".format(result.avg_num_in_q))
+    output_file.write("Server utilization: {:.6f}\n".format(result.server_utilization))
+    output_file.write("Time simulation ended: {:.6f} minutes".format(result.sim_time))
+
+
+# main function of the simulation
+def main():
+    # Read input parameters. from the input file
+    params = read_params(INPUT_FILE_NAME)
+
+    # create the output file and event log file
+    with open(OUTPUT_FILE_NAME, 'w') as output_file, TextTrace(EVENT_LOG) as trace:
+        # Write report heading and input parameters. to the output file
+        write_params(output_file, params)
+
+        # Run the simulation and write the report.
+        result = SingleServerQueue(trace=trace).run(params)
+        write_result(output_file, result)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
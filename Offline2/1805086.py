@@ -1,84 +1,180 @@
 # main file to run the simulation
+#
+#   python 1805086.py
+#       reads one scenario from in.txt and writes the report to out.txt
+#   python 1805086.py --batch scenarios.jsonl [--output out.txt] [--format text|csv]
+#       reads one scenario per line (a JSON object with the InventorySystem
+#       constructor arguments, see readScenarios) and writes every result as
+#       soon as its scenario finishes, as text reports or as one CSV table
+#   python 1805086.py --search 100 [--output out.txt]
+#       reads the model from in.txt, ignores its policies and searches every
+#       (s, S) with 0 <= s < S < 100 by successive halving (policy_search.py)
+#   --crn        common random numbers: every policy sees the same demands
+#   --antithetic antithetic pairs (implies --crn)
+#   --warmup     detect the end of the initial transient in every run (MSER-5
+#                on the monthly costs) and average over numMonths months after it;
+#                --warmup-batch and --warmup-min-batches set the detector, and
+#                batch mode writes the warm-up periods in text format only
 
 # import inventory_system
 from inventory_system import InventorySystem
+from policy_search import searchPolicies
+
+import argparse
+import json
 
 InputFileName = "in.txt"
 outputFileName = "out.txt"
 
-def writeParameters(inventorySystem, outputFile):
-    with outputFile as file:
-        file.write("------Single-Product Inventory System------\n\n")
-        file.write("Initial inventory level: %d items\n\n" % (inventorySystem.initialInventoryLevel))
-        file.write("Number of demand sizes: %d\n\n" % (inventorySystem.numValuesDemand))
-        file.write("Distribution function of demand sizes: ")
-        
-        for i in range(1, inventorySystem.numValuesDemand + 1):
-            file.write("%.2f " % (inventorySystem.probDistribDemand[i]))
-        
-        file.write("\n\n")
-        
-        file.write("Mean inter-demand time: %.2f months\n\n" % (inventorySystem.meanInterDemand))
-        file.write("Delivery lag range: %.2f to %.2f months\n\n" % (inventorySystem.minLag, inventorySystem.maxLag))
-        file.write("Length of simulation: %d months\n\n" % (inventorySystem.numMonths))
-        file.write("Costs:\n")
-        file.write("K = %.2f\n" % (inventorySystem.setupCost))
-        file.write("i = %.2f\n" % (inventorySystem.incrementalCost))
-        file.write("h = %.2f\n" % (inventorySystem.holdingCost))
-        file.write("pi = %.2f\n\n" % (inventorySystem.shortageCost))
-        file.write("Number of policies: %d\n\n" % (inventorySystem.numPolicy))
-        file.write("Policies:\n")
-        file.write("--------------------------------------------------------------------------------------------------\n")
-        file.write(" Policy        Avg_total_cost     Avg_ordering_cost      Avg_holding_cost     Avg_shortage_cost\n")
-        file.write("--------------------------------------------------------------------------------------------------\n\n")
-        
-
-def createInventorySystem(inputFile):
+# columns of the CSV output
+CSV_HEADER = "scenario,s,S,avg_total_cost,avg_ordering_cost,avg_holding_cost,avg_shortage_cost\n"
+
+def writeParameters(inventorySystem, file):
+    file.write("------Single-Product Inventory System------\n\n")
+    file.write("Initial inventory level: %d items\n\n" % (inventorySystem.initialInventoryLevel))
+    file.write("Number of demand sizes: %d\n\n" % (inventorySystem.numValuesDemand))
+    file.write("Distribution function of demand sizes: ")
+
+    for i in range(1, inventorySystem.numValuesDemand + 1):
+        file.write("%.2f " % (inventorySystem.probDistribDemand[i]))
+
+    file.write("\n\n")
+
+    file.write("Mean inter-demand time: %.2f months\n\n" % (inventorySystem.meanInterDemand))
+    file.write("Delivery lag range: %.2f to %.2f months\n\n" % (inventorySystem.minLag, inventorySystem.maxLag))
+    file.write("Length of simulation: %d months\n\n" % (inventorySystem.numMonths))
+    file.write("Costs:\n")
+    file.write("K = %.2f\n" % (inventorySystem.setupCost))
+    file.write("i = %.2f\n" % (inventorySystem.incrementalCost))
+    file.write("h = %.2f\n" % (inventorySystem.holdingCost))
+    file.write("pi = %.2f\n\n" % (inventorySystem.shortageCost))
+    file.write("Number of policies: %d\n\n" % (inventorySystem.numPolicy))
+    file.write("Policies:\n")
+    file.write("--------------------------------------------------------------------------------------------------\n")
+    file.write(" Policy        Avg_total_cost     Avg_ordering_cost      Avg_holding_cost     Avg_shortage_cost\n")
+    file.write("--------------------------------------------------------------------------------------------------\n\n")
+
+
+def createInventorySystem(inputFile, **options):
     with inputFile as file:
         line = file.readline()
         initialInventoryLevel, numMonths, numPolicy = map(int, line.split())
-        
+
         line = file.readline()
         numValuesDemand, meanInterDemand = map(float, line.split())
         numValuesDemand = int(numValuesDemand)
-        
+
         line = file.readline()
         setupCost, incrementalCost, holdingCost, shortageCost = map(float, line.split())
-        
+
         line = file.readline()
         minLag, maxLag = map(float, line.split())
-        
+
         line = file.readline()
         probDistribDemand = list(map(float, line.split()))
-        
+
         #insert 0.0 at the beginning of the list
         probDistribDemand.insert(0, 0.0)
-        
+
         policies = []
         for i in range(numPolicy):
             line = file.readline()
             policies.append(list(map(int, line.split())))
-            
+
         # create the inventory system
-        inventorySystem = InventorySystem(initialInventoryLevel, numMonths, numPolicy, numValuesDemand, meanInterDemand, setupCost, incrementalCost, holdingCost, shortageCost, minLag, maxLag, probDistribDemand, policies)
-        
+        inventorySystem = InventorySystem(initialInventoryLevel, numMonths, numPolicy, numValuesDemand, meanInterDemand, setupCost, incrementalCost, holdingCost, shortageCost, minLag, maxLag, probDistribDemand, policies, **options)
+
         return inventorySystem
-    
-def writeResults(inventorySystem, outputFile):
-    with outputFile as file:
-        file.write(inventorySystem.report_string)
-        file.write("--------------------------------------------------------------------------------------------------")
+
+def readScenarios(file, **options):
+    # yield one inventory system per non-empty line of a JSON Lines file, e.g.
+    # {"initialInventoryLevel": 60, "numMonths": 120, "meanInterDemand": 0.1,
+    #  "setupCost": 32, "incrementalCost": 3, "holdingCost": 1, "shortageCost": 5,
+    #  "minLag": 0.5, "maxLag": 1.0, "probDistribDemand": [0.167, 0.5, 0.833, 1.0],
+    #  "policies": [[20, 40], [20, 60]]}
+    # probDistribDemand is given like the in.txt line, without the leading 0.0
+    for line in file:
+        if not line.strip():
+            continue
+        scenario = json.loads(line)
+        probDistribDemand = [0.0] + [float(p) for p in scenario["probDistribDemand"]]
+        policies = [list(map(int, policy)) for policy in scenario["policies"]]
+        yield InventorySystem(int(scenario["initialInventoryLevel"]), int(scenario["numMonths"]), len(policies), len(probDistribDemand) - 1, float(scenario["meanInterDemand"]), float(scenario["setupCost"]), float(scenario["incrementalCost"]), float(scenario["holdingCost"]), float(scenario["shortageCost"]), float(scenario["minLag"]), float(scenario["maxLag"]), probDistribDemand, policies, **options)
+
+def writeResults(inventorySystem, file):
+    file.write(inventorySystem.report_string)
+    if inventorySystem.warmupDetection:
+        writeWarmups(inventorySystem, file)
+    file.write("--------------------------------------------------------------------------------------------------")
+
+def writeWarmups(inventorySystem, file):
+    # months deleted as warm-up in every run of every policy ("-": no steady state detected)
+    file.write("Warm-up months deleted (MSER-5 truncation point):\n")
+    for (s, S), warmups in zip(inventorySystem.policies, inventorySystem.policyWarmups):
+        runs = ["%s (%s)" % ("-" if warmup["deleted"] is None else warmup["deleted"], "-" if warmup["truncation"] is None else warmup["truncation"]) for warmup in warmups]
+        file.write("(%2d,%3d) %s\n" % (s, S, "  ".join(runs)))
+    file.write("\n")
+
+def writeCsvResults(scenario, inventorySystem, file):
+    for s, S, avgOrderingCost, avgHoldingCost, avgShortageCost in inventorySystem.policyCosts():
+        file.write("%d,%d,%d,%r,%r,%r,%r\n" % (scenario, s, S, avgOrderingCost + avgHoldingCost + avgShortageCost, avgOrderingCost, avgHoldingCost, avgShortageCost))
+
+def runBatch(scenarioFileName, outputFileName, outputFormat, **options):
+    # scenarios are read, simulated and written one at a time, so memory use
+    # does not depend on the number of scenarios
+    with open(scenarioFileName, "r") as infile, open(outputFileName, "w", buffering=1 << 20) as outfile:
+        if outputFormat == "csv":
+            outfile.write(CSV_HEADER)
+        for scenario, inventorySystem in enumerate(readScenarios(infile, **options)):
+            if outputFormat == "csv":
+                writeCsvResults(scenario, inventorySystem, outfile)
+            else:
+                writeParameters(inventorySystem, outfile)
+                inventorySystem.simulate()
+                writeResults(inventorySystem, outfile)
+                outfile.write("\n\n")
+
+def writeSearchResults(inventorySystem, result, file):
+    file.write("Best policies (successive halving, %d policy-months evaluated):\n" % (result.simulatedMonths))
+    for estimate in result.ranking:
+        interval = estimate.interval
+        file.write("(%2d,%3d) %19.2f +- %.2f (%d replications of %d months)\n" % (estimate.s, estimate.S, interval.mean, interval.half_width, interval.count, inventorySystem.numMonths))
 
 def main():
+    parser = argparse.ArgumentParser(description="Single-product inventory system simulation")
+    parser.add_argument("--batch", help="JSON Lines file with one scenario per line")
+    parser.add_argument("--output", default=outputFileName, help="output file (default: %(default)s)")
+    parser.add_argument("--format", choices=["text", "csv"], default="text", help="output format of batch mode")
+    parser.add_argument("--search", type=int, metavar="MAX", help="search every (s, S) with 0 <= s < S < MAX")
+    parser.add_argument("--keep", type=int, default=10, help="number of policies listed by --search")
+    parser.add_argument("--crn", action="store_true", help="common random numbers for all policies")
+    parser.add_argument("--antithetic", action="store_true", help="antithetic pairs of runs (implies --crn)")
+    parser.add_argument("--warmup", action="store_true", help="detect and delete the warm-up period of every run")
+    parser.add_argument("--warmup-batch", type=int, default=5, help="months per batch of the warm-up detector (default: %(default)s)")
+    parser.add_argument("--warmup-min-batches", type=int, default=10, help="batches before the first warm-up test (default: %(default)s)")
+    args = parser.parse_args()
+    if args.warmup and args.batch is not None and args.format == "csv":
+        parser.error("--warmup writes the warm-up periods in the text reports only; use --format text")
+    options = {"commonRandomNumbers": args.crn, "antithetic": args.antithetic, "warmupDetection": args.warmup, "warmupBatchSize": args.warmup_batch, "warmupMinBatches": args.warmup_min_batches}
+
+    if args.search is not None:
+        with open(InputFileName, "r") as infile, open(args.output, "w") as outfile:
+            inventorySystem = createInventorySystem(infile, **options)
+            result = searchPolicies(inventorySystem, range(args.search), range(args.search), keep=args.keep)
+            writeSearchResults(inventorySystem, result, outfile)
+        return
+
+    if args.batch is not None:
+        runBatch(args.batch, args.output, args.format, **options)
+        return
+
     # read the input file and create the inventory system
-    infile = open(InputFileName, "r")
-    outfile = open(outputFileName, "w")
-    inventorySystem = createInventorySystem(infile)
-    writeParameters(inventorySystem, outfile)
-    inventorySystem.simulate()
-    outfile = open(outputFileName, "a")
-    writeResults(inventorySystem, outfile)
-    
-    
+    with open(InputFileName, "r") as infile, open(args.output, "w") as outfile:
+        inventorySystem = createInventorySystem(infile, **options)
+        writeParameters(inventorySystem, outfile)
+        inventorySystem.simulate()
+        writeResults(inventorySystem, outfile)
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,74 @@
+# Sampler for the demand-size distribution of the inventory system.
+#
+# The distribution is given the way createInventorySystem reads it: a
+# cumulative table with probDistrib[i] = P(X <= i) for i = 1..numValues
+# (index 0 unused).  The sampler is built once and then draws in O(log n)
+# or O(1) time per value instead of scanning the table.
+#
+# method "inverse" is the inverse-transform method of the original linear
+# scan, done by binary search.  It maps every uniform to the same value as
+# the scan did, so old results are reproduced exactly.
+# method "alias" is Walker's alias method (Vose's construction).  It needs
+# O(1) time per draw for any number of values, but maps uniforms to values
+# differently, so it gives a different (equally valid) sequence.
+
+import bisect
+
+import numpy as np
+
+
+class DiscreteSampler:
+    def __init__(self, probDistrib, numValues, method="inverse"):
+        self.numValues = numValues      # values are 1..numValues
+        self.method = method            # "inverse" or "alias"
+
+        self.cumulative = list(probDistrib[1:numValues + 1])        # P(X <= i) for i = 1..numValues
+        self.cumulativeArray = np.array(self.cumulative)
+
+        if method == "alias":
+            self.__buildAlias__()
+        elif method != "inverse":
+            raise ValueError("unknown sampling method: %s" % method)
+
+    def __buildAlias__(self):
+        # probability of every value; a table that ends below 1 gives the rest
+        # to the last value, just like the inverse transform does
+        pmf = np.diff(self.cumulativeArray, prepend=0.0)
+        pmf[-1] += 1.0 - self.cumulativeArray[-1]
+        scaled = list(pmf * self.numValues / pmf.sum())
+
+        self.aliasProb = [1.0] * self.numValues         # probability of keeping column i
+        self.alias = list(range(self.numValues))        # value taken otherwise
+        small = [i for i in range(self.numValues) if scaled[i] < 1.0]
+        large = [i for i in range(self.numValues) if scaled[i] >= 1.0]
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            self.aliasProb[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] += scaled[less] - 1.0
+            if scaled[more] < 1.0:
+                small.append(more)
+            else:
+                large.append(more)
+
+        self.aliasProbArray = np.array(self.aliasProb)
+        self.aliasArray = np.array(self.alias)
+
+    def sample(self, u):
+        # value for one uniform u in (0, 1)
+        if self.method == "inverse":
+            # first i with u <= P(X <= i); the last value if u is above the table
+            return min(bisect.bisect_left(self.cumulative, u), self.numValues - 1) + 1
+        x = u * self.numValues
+        i = int(x)
+        return (i if x - i < self.aliasProb[i] else self.alias[i]) + 1
+
+    def sampleBlock(self, generator, stream, n):
+        # n values from the next n numbers of an Lcgrand stream
+        u = generator.lcgrand_block(stream, n)
+        if self.method == "inverse":
+            return np.minimum(np.searchsorted(self.cumulativeArray, u, side="left"), self.numValues - 1) + 1
+        x = u * self.numValues
+        i = x.astype(np.int64)
+        return np.where(x - i < self.aliasProbArray[i], i, self.aliasArray[i]) + 1
@@ -5,11 +5,27 @@
 
 # Path: inventory_system.py
 
-# import lcg_rand
-from lcg_rand import Lcgrand
+# the shared simulation kernel (simkernel) is in the repository root
+import os
+import sys
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
 
-# import math
-import math
+# import the simulation kernel and lcg_rand
+from simkernel import Simulation, TimeWeighted, LinearCalendar, load_checkpoint
+
+# import the distribution accumulators
+from simkernel import TimeWeightedHistogram, Histogram
+
+# process pool for evaluating policies in parallel
+from concurrent.futures import ProcessPoolExecutor
+
+# import the replication confidence intervals and the warm-up detection
+from simkernel.output_analysis import replicate, MserWarmup
+
+# import the demand-size sampler
+from discrete_sampler import DiscreteSampler
 
 
 # constants (event types)
@@ -19,10 +35,19 @@ DEMAND = 2
 END = 3
 EVALUATE = 4
 
-class InventorySystem:
-    # constructor
-    def __init__(self, initialInventoryLevel, numMonths, numPolicy, numValuesDemand, meanInterDemand, setupCost, incrementalCost, holdingCost, shortageCost, minLag, maxLag, probDistribDemand, policies, numEventsTypes=4):
-        self.generator = Lcgrand()
+# streams of the common random numbers mode
+STREAM_INTER_DEMAND = 1
+STREAM_DEMAND_SIZE = 2
+STREAM_LAG = 3
+
+class InventorySystem(Simulation):
+    # names of the values returned by __levels__
+    LEVELS = ("onHand", "backlog", "inventoryLevel")
+    
+    # constructor; the clock, calendar, streams and event loop are the kernel's;
+    # with one pending event per type the calendar is the original linear scan
+    def __init__(self, initialInventoryLevel, numMonths, numPolicy, numValuesDemand, meanInterDemand, setupCost, incrementalCost, holdingCost, shortageCost, minLag, maxLag, probDistribDemand, policies, numEventsTypes=4, demandSampling="inverse", profiler=None, commonRandomNumbers=False, antithetic=False, warmupDetection=False, warmupBatchSize=5, warmupMinBatches=10):
+        Simulation.__init__(self, calendar=LinearCalendar(numEventsTypes), profiler=profiler)
         
         
         self.amount = 0                 # order quantity
@@ -31,7 +56,6 @@ class InventorySystem:
         self.initialInventoryLevel = initialInventoryLevel # initial inventory level
         self.inventoryLevel = initialInventoryLevel
         
-        self.nextEventType = NONE       # next event type
         self.numEventsTypes = numEventsTypes    # number of event types in the simulation (ARRIVAL, DEMAND, END, EVALUATE)
         
         self.numMonths = numMonths      # number of months to simulate
@@ -50,122 +74,324 @@ class InventorySystem:
         self.maxLag = maxLag      # maximum lag between order placement and receipt
         
         self.probDistribDemand = probDistribDemand      # probability distribution of demand
+        self.demandSampler = DiscreteSampler(probDistribDemand, numValuesDemand, demandSampling)      # sampler of demand sizes ("inverse" or "alias")
         
         self.policies = policies      # policies to simulate
         
-        self.areaHolding = 0.0          # area under holding cost curve
-        self.areaShortage = 0.0         # area under shortage cost curve
+        self.holdingStat = TimeWeighted()       # area under holding cost curve
+        self.shortageStat = TimeWeighted()      # area under shortage cost curve
+        self.accumulators = [self.holdingStat, self.shortageStat]
+        self.levelStat = None                   # time-weighted distribution of the inventory level (None: not collected)
+        self.policyDistributions = []           # levelStat summary of every simulated policy
         
         
-        self.simTime = 0.0              # current simulation time
-        self.timeLastEvent = self.simTime      # time of last event processed
+        self.totalOrderingCost = 0.0    # total ordering cost
+        self.ended = False              # the END event of the current run has happened
+        self.endEvent = None            # handle of the END event
         
+        self.arrivalEvent = None            # handle of the outstanding order arrival
+        self.reportRows = []                # report row of every simulated policy
+        self.policySeeds = None             # stream seeds every policy starts from in parallel and common random numbers modes
+        self.replicationSeed = None         # seed the replications of replicatePolicy spawn substreams from
         
-        self.totalOrderingCost = 0.0    # total ordering cost
+        self.policyIndex = 0                # policy being simulated in sequential mode
         
-        self.timeNextEvent = [0.0] * (self.numEventsTypes + 1)      # time of next event of each type
-        self.report_string = ""
+        # common random numbers: demand times, demand sizes and delivery lags
+        # come from their own streams, which restart from policySeeds for
+        # every policy, so all policies see the same demands; antithetic
+        # pairs every run with a second one that uses 1 - u and reports the
+        # average of the two
+        self.antithetic = antithetic
+        self.commonRandomNumbers = commonRandomNumbers or antithetic
+        self.streamInterDemand = STREAM_INTER_DEMAND if self.commonRandomNumbers else 1
+        self.streamDemandSize = STREAM_DEMAND_SIZE if self.commonRandomNumbers else 1
+        self.streamLag = STREAM_LAG if self.commonRandomNumbers else 1
+        self.pairCosts = None               # average costs of the first run of an antithetic pair
         
+        # warm-up detection: the monthly costs of every run go to an MSER-5
+        # detector; once it finds the end of the initial transient, the costs
+        # and areas restart and the run goes on for numMonths more months
+        self.warmupDetection = warmupDetection
+        self.warmupBatchSize = warmupBatchSize      # months per batch of the detector
+        self.warmupMinBatches = warmupMinBatches    # batches before the first test
+        self.warmup = None                  # MserWarmup of the current run (None: no warm-up detection)
+        self.lastTotalCost = 0.0            # total cost of the run up to the last evaluation
+        self.runWarmups = []                # warm-up summary of every run of the current policy
+        self.policyWarmups = []             # runWarmups of every simulated policy
         
-    def __expon__(self, mean):
-        return -mean * math.log(self.generator.lcgrand(1))
-    
-    def __timing__(self):
-        self.nextEventType = NONE               # set default next event type
-        minTimeNextEvent = 1.0e+29              # set default min time next event
         
-        for i in range(1, self.numEventsTypes + 1):
-            if self.timeNextEvent[i] < minTimeNextEvent:
-                minTimeNextEvent = self.timeNextEvent[i]        # update min time next event
-                self.nextEventType = i                          # update next event type
+    @classmethod
+    def fromCheckpoint(cls, path):
+        # an inventory system in the state saved at path; resume() continues it
+        inventorySystem = cls.__new__(cls)
+        Simulation.__init__(inventorySystem)
+        inventorySystem.__restore__(load_checkpoint(path))
+        return inventorySystem
+        
+    @property
+    def generator(self):
+        return self.lcg
+        
+    @generator.setter
+    def generator(self, generator):
+        self.lcg = generator
         
-        if self.nextEventType == NONE:
-            print("Event list empty at time %f" % (self.simTime))
-            exit(1)
+    def collectDistributions(self, minLevel=-100, maxLevel=200, quantiles=(0.5, 0.9, 0.99)):
+        # keep the time-weighted distribution of the inventory level of every
+        # policy (of the second run of an antithetic pair) in policyDistributions
+        self.levelStat = TimeWeightedHistogram(Histogram(minLevel, maxLevel + 1, maxLevel + 1 - minLevel, discrete=True), quantiles)
+        self.accumulators = [self.holdingStat, self.shortageStat, self.levelStat]
         
-        self.simTime = minTimeNextEvent
+    def __levelDistribution__(self):
+        return self.levelStat.summary(self.sim_time - self.levelStat.start_time) if self.levelStat is not None else None
         
-    def __updateTimeAvgStats__(self):
-        timeSinceLastEvent = self.simTime - self.timeLastEvent
-        self.timeLastEvent = self.simTime
+    @property
+    def areaHolding(self):
+        return self.holdingStat.area
         
+    @property
+    def areaShortage(self):
+        return self.shortageStat.area
+        
+    @property
+    def report_string(self):
+        return "".join(self.reportRows)
+        
+    def __handlers__(self):
+        return {ARRIVAL: ("arrival", self.__orderArrival__), DEMAND: ("demand", self.__demand__), END: ("end", self.__end__), EVALUATE: ("evaluate", self.__evaluate__)}
+        
+    def __levels__(self):
+        # inventory on hand, backlog and the level itself
+        level = self.inventoryLevel
+        return (level if level > 0 else 0, -level if level < 0 else 0, level)
+        
+    def __time_avg_updater__(self):
+        # the level histogram of collectDistributions() needs the generic update
+        if self.levelStat is None:
+            return self.__updateAreas__
+        return Simulation.__time_avg_updater__(self)
+        
+    def __updateAreas__(self):
+        timeSinceLastEvent = self.sim_time - self.time_last_event
+        self.time_last_event = self.sim_time
         if self.inventoryLevel < 0:
-            self.areaShortage -= self.inventoryLevel * timeSinceLastEvent
+            self.shortageStat.area -= self.inventoryLevel * timeSinceLastEvent
         elif self.inventoryLevel > 0:
-            self.areaHolding += self.inventoryLevel * timeSinceLastEvent
-            
+            self.holdingStat.area += self.inventoryLevel * timeSinceLastEvent
+        
+    def __finished__(self):
+        return self.ended
+        
+    def __watches__(self):
+        return {"backlog": lambda: -self.inventoryLevel}
+        
     def __orderArrival__(self):
         self.inventoryLevel += self.amount
-        self.timeNextEvent[ARRIVAL] = 1.0e+30
         
     def __demand__(self):
-        demand = self.__randomInteger__(self.probDistribDemand)
+        demand = self.demandSampler.sample(self.__random__(self.streamDemandSize))
         # print("Demand: ", demand)
         self.inventoryLevel -= demand
-        self.timeNextEvent[DEMAND] = self.simTime + self.__expon__(self.meanInterDemand)
+        self.calendar.schedule(self.sim_time + self.__expon__(self.meanInterDemand, self.streamInterDemand), DEMAND)
+        
+    def __end__(self):
+        self.ended = True
         
     def __evaluate__(self):
         # print("Evaluate at time: ", self.simTime)
+        if self.warmup is not None and self.sim_time > 0:
+            self.__observeMonth__()
         if self.inventoryLevel < self.smalls:
             self.amount = self.bigs - self.inventoryLevel
             self.totalOrderingCost += self.setupCost + self.incrementalCost * self.amount
-            self.timeNextEvent[ARRIVAL] = self.simTime + self.__uniform__(self.minLag, self.maxLag)
-        self.timeNextEvent[EVALUATE] = self.simTime + 1.0
-        
-    def __randomInteger__(self, probDistrib):
-        i = 0
-        u = self.generator.lcgrand(1)
-        for i in range(1, self.numValuesDemand + 1):
-            if u <= probDistrib[i]:
-                break
-        return i
-        
-    def __uniform__(self, a, b):
-        return a + (b - a) * self.generator.lcgrand(1)
+            arrivalTime = self.sim_time + self.__uniform__(self.minLag, self.maxLag, self.streamLag)
+            if self.arrivalEvent is None:
+                self.arrivalEvent = self.calendar.schedule(arrivalTime, ARRIVAL)
+            else:
+                self.calendar.reschedule(self.arrivalEvent, arrivalTime)    # a new order replaces an outstanding one
+        self.calendar.schedule(self.sim_time + 1.0, EVALUATE)
+    
+    def __observeMonth__(self):
+        # cost of the month that just ended
+        totalCost = self.totalOrderingCost + self.holdingCost * self.holdingStat.area + self.shortageCost * self.shortageStat.area
+        monthCost = totalCost - self.lastTotalCost
+        self.lastTotalCost = totalCost
+        if self.warmup.add(monthCost):
+            # steady state: forget the warm-up months and simulate numMonths more
+            self.totalOrderingCost = 0.0
+            self.lastTotalCost = 0.0
+            self.__reset_statistics__()
+            self.calendar.reschedule(self.endEvent, self.sim_time + self.numMonths)
     
     def __reset__(self):
-        self.simTime = 0.0
+        self.__reset_clock__()      # clock, event list and areas
         self.inventoryLevel = self.initialInventoryLevel
-        self.timeLastEvent = self.simTime
         
         self.totalOrderingCost = 0.0
-        self.areaHolding = 0.0
-        self.areaShortage = 0.0
+        self.ended = False
+        if self.warmupDetection:
+            self.warmup = MserWarmup(self.warmupBatchSize, self.warmupMinBatches)
+            self.lastTotalCost = 0.0
         
-        self.timeNextEvent[ARRIVAL] = 1.0e+30
-        self.timeNextEvent[EVALUATE] = 0.0
-        self.timeNextEvent[DEMAND] = self.simTime + self.__expon__(self.meanInterDemand)
-        self.timeNextEvent[END] = self.numMonths
+        self.arrivalEvent = None
+        self.calendar.schedule(0.0, EVALUATE)
+        self.calendar.schedule(self.sim_time + self.__expon__(self.meanInterDemand, self.streamInterDemand), DEMAND)
+        self.endEvent = self.calendar.schedule(self.numMonths, END)
     
     def __simulateSinglePolicy__(self, s, S):
         self.smalls = s
         self.bigs = S
+        self.complement = False
+        self.pairCosts = None
+        self.runWarmups = []
         
+        self.__startRun__()
+        return self.__finishPolicy__()
+    
+    def __startRun__(self):
+        if self.commonRandomNumbers:
+            self.generator.zrng = list(self.policySeeds)
         self.__reset__()
-        
-        while True:
-            self.__timing__()
-            self.__updateTimeAvgStats__()
-            if self.nextEventType == ARRIVAL:
-                self.__orderArrival__()
-            elif self.nextEventType == DEMAND:
-                self.__demand__()
-            elif self.nextEventType == EVALUATE:
-                self.__evaluate__()
-            elif self.nextEventType == END:
-                self.__report__()
-                break
+    
+    def __finishPolicy__(self):
+        # run the started run to its end, followed by its antithetic partner
+        # if it is the first run of a pair, and return the report row
+        self.__run_events__()
+        self.__recordWarmup__()
+        if self.antithetic and not self.complement:
+            self.pairCosts = self.__runCosts__()
+            self.complement = True
+            self.__startRun__()
+            self.__run_events__()
+            self.__recordWarmup__()
+        return self.__report__()
+    
+    def __recordWarmup__(self):
+        # warm-up of the finished run, in months
+        if self.warmup is not None:
+            self.runWarmups.append(self.warmup.summary())
+    
+    def __rememberSeeds__(self):
+        # seeds every policy restarts from in common random numbers mode
+        if self.commonRandomNumbers:
+            self.policySeeds = list(self.generator.zrng)
+    
+    def __averageCosts__(self):
+        # costs of the policy; the average of both runs of an antithetic pair
+        costs = self.__runCosts__()
+        if self.pairCosts is not None:
+            costs = tuple((first + second) / 2 for first, second in zip(self.pairCosts, costs))
+        return costs
             
-    def __report__(self):
+    def __runCosts__(self):
         avgOrderingCost = self.totalOrderingCost / self.numMonths
-        avgHoldingCost = self.areaHolding * self.holdingCost / self.numMonths
-        avgShortageCost = self.areaShortage * self.shortageCost / self.numMonths
-        report_str = "(%2d,%3d) %19.2f %19.2f %19.2f %19.2f\n\n" % (self.smalls, self.bigs, avgOrderingCost + avgHoldingCost + avgShortageCost, avgOrderingCost, avgHoldingCost, avgShortageCost)
-        self.report_string += report_str
+        avgHoldingCost = self.holdingStat.area * self.holdingCost / self.numMonths
+        avgShortageCost = self.shortageStat.area * self.shortageCost / self.numMonths
+        return avgOrderingCost, avgHoldingCost, avgShortageCost
             
+    def __report__(self):
+        avgOrderingCost, avgHoldingCost, avgShortageCost = self.__averageCosts__()
+        report_str = "(%2d,%3d) %19.2f %19.2f %19.2f %19.2f\n\n" % (self.smalls, self.bigs, avgOrderingCost + avgHoldingCost + avgShortageCost, avgOrderingCost, avgHoldingCost, avgShortageCost)
+        return report_str
+    
+    def __replication__(self, index):
+        # one replication of the current policy, continuing the shared stream;
+        # in common random numbers mode replication i uses substream i of
+        # replicationSeed, so replication i of every policy sees the same demands
+        if self.commonRandomNumbers:
+            self.policySeeds = self.generator.lcgrand_spawn(self.replicationSeed, index).zrng
+        self.__simulateSinglePolicy__(self.smalls, self.bigs)
+        return sum(self.__averageCosts__())
     
-    def simulate(self):
+    def replicatePolicy(self, s, S, numReplications, relPrecision=None, level=0.95, minReplications=10):
+        # confidence interval of the average total cost of policy (s, S) from
+        # independent replications; with relPrecision it stops as soon as the
+        # relative half-width is small enough; in common random numbers mode
+        # the replications are substreams of the current seed of stream 1
+        self.smalls = s
+        self.bigs = S
+        self.replicationSeed = self.generator.lcgrandgt(1)
+        return replicate(self.__replication__, numReplications, relPrecision, level, minReplications)
+    
+    def policyCosts(self):
+        # average ordering, holding and shortage cost of every policy, sharing
+        # one stream like the sequential simulate()
+        self.__rememberSeeds__()
+        costs = []
         for i in range(self.numPolicy):
             s, S = self.policies[i]
             self.__simulateSinglePolicy__(s, S)
-        
\ No newline at end of file
+            costs.append([s, S] + list(self.__averageCosts__()))
+        return costs
+    
+    def resume(self):
+        # continue a sequential simulate() restored by fromCheckpoint
+        self.__simulatePolicies__(True)
+        
+    def __simulatePolicies__(self, resuming):
+        while self.policyIndex < self.numPolicy:
+            if resuming:
+                row = self.__finishPolicy__()   # finish the interrupted policy
+                resuming = False
+            else:
+                s, S = self.policies[self.policyIndex]
+                row = self.__simulateSinglePolicy__(s, S)
+            self.reportRows.append(row)
+            if self.levelStat is not None:
+                self.policyDistributions.append(self.__levelDistribution__())
+            if self.warmupDetection:
+                self.policyWarmups.append(self.runWarmups)
+            self.policyIndex += 1
+    
+    def __evaluatePolicy__(self, policy):
+        # every policy restarts from the same seeds (common random numbers),
+        # so its row does not depend on the other policies or on the worker
+        self.generator.zrng = list(self.policySeeds)
+        s, S = policy
+        row = self.__simulateSinglePolicy__(s, S)
+        return row, self.__levelDistribution__(), self.runWarmups
+    
+    def simulate(self, parallel=False, numWorkers=None, checkpointPath=None, checkpointInterval=1000000):
+        # sequential mode: the policies share one stream, one after another
+        # (unless commonRandomNumbers is set); with checkpointPath the
+        # complete state is saved there every checkpointInterval events
+        if not parallel:
+            self.__rememberSeeds__()
+            self.checkpoint_path = checkpointPath
+            self.checkpoint_interval = checkpointInterval
+            self.event_count = 0
+            self.policyIndex = 0
+            self.__simulatePolicies__(False)
+            return
+        
+        # parallel mode: the policies are spread over a process pool and the
+        # rows are collected in input order; the workers would all write the
+        # same checkpoint file, and a profiler would be counted in their
+        # copies of the system and thrown away
+        if checkpointPath is not None:
+            raise ValueError("checkpoints are only written in sequential mode")
+        if self.profiler is not None and numWorkers != 1:
+            raise ValueError("a profiler only counts the runs of sequential mode or numWorkers=1")
+        self.checkpoint_path = None     # no stale path of an earlier sequential run
+        self.policySeeds = list(self.generator.zrng)
+        policies = self.policies[:self.numPolicy]
+        if numWorkers == 1:
+            results = [self.__evaluatePolicy__(policy) for policy in policies]
+        else:
+            with ProcessPoolExecutor(numWorkers) as executor:
+                results = list(executor.map(self.__evaluatePolicy__, policies))
+        for row, distribution, warmups in results:
+            self.reportRows.append(row)
+            if self.levelStat is not None:
+                self.policyDistributions.append(distribution)
+            if self.warmupDetection:
+                self.policyWarmups.append(warmups)
+
+
+# run one point of a parameter sweep (see sweep_runner.py); point holds the
+# InventorySystem constructor arguments except numPolicy, and seeds the
+# Lcgrand seeds the run starts from
+def runScenario(point, seeds):
+    inventorySystem = InventorySystem(numPolicy=len(point["policies"]), **point)
+    inventorySystem.generator.zrng = list(seeds)
+    return {"policies": inventorySystem.policyCosts()}
@@ -0,0 +1,141 @@
+# Multi-SKU, multi-location version of the inventory system.
+#
+# Every (SKU, location) pair is its own copy of the single-product model of
+# InventorySystem, with its own (s, S) policy, costs and demand rate.  The
+# state of all pairs is held in NumPy arrays (struct of arrays), and the
+# event calendar is the pair of arrays holding the next demand time and the
+# next order arrival time of every pair.
+#
+# Between two monthly reviews all pairs whose next event falls before the
+# review are advanced together, one event per pair per step, so a month
+# takes as many vectorized steps as the busiest pair has events.  The review
+# itself (InventorySystem.__evaluate__) is a single pass over all pairs.
+# Ties are broken like InventorySystem: arrival, then demand, then end of
+# simulation, then review.
+
+import os
+import sys
+
+import numpy as np
+
+# the shared simulation kernel (simkernel) is in the repository root
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+# import lcg_rand
+from simkernel import Lcgrand
+
+# import the demand-size sampler
+from discrete_sampler import DiscreteSampler
+
+# streams of the random number generator
+STREAM_INTER_DEMAND = 1
+STREAM_DEMAND_SIZE = 2
+STREAM_LAG = 3
+
+
+class MultiSkuInventorySystem:
+    # constructor; every per-pair parameter is a scalar or an array that
+    # broadcasts to (numSkus, numLocations)
+    def __init__(self, numSkus, numLocations, initialInventoryLevel, numMonths, numValuesDemand, meanInterDemand, setupCost, incrementalCost, holdingCost, shortageCost, minLag, maxLag, probDistribDemand, smalls, bigs, generator=None, demandSampling="inverse"):
+        self.generator = generator if generator is not None else Lcgrand()
+        self.shape = (numSkus, numLocations)
+        self.numPairs = numSkus * numLocations
+        self.numMonths = numMonths                  # number of months to simulate
+
+        self.initialInventoryLevel = self.__perPair__(initialInventoryLevel, np.int64)
+        self.meanInterDemand = self.__perPair__(meanInterDemand)
+        self.setupCost = self.__perPair__(setupCost)
+        self.incrementalCost = self.__perPair__(incrementalCost)
+        self.holdingCost = self.__perPair__(holdingCost)
+        self.shortageCost = self.__perPair__(shortageCost)
+        self.minLag = self.__perPair__(minLag)
+        self.maxLag = self.__perPair__(maxLag)
+        self.smalls = self.__perPair__(smalls, np.int64)
+        self.bigs = self.__perPair__(bigs, np.int64)
+
+        # sampler of demand sizes, shared by all pairs
+        self.demandSampler = DiscreteSampler(probDistribDemand, numValuesDemand, demandSampling)
+
+        # state of every pair
+        self.inventoryLevel = self.initialInventoryLevel.copy()
+        self.amount = np.zeros(self.numPairs, dtype=np.int64)      # quantity of the last order
+        self.timeLastEvent = np.zeros(self.numPairs)
+        self.nextDemand = np.zeros(self.numPairs)                  # time of the next demand
+        self.nextArrival = np.full(self.numPairs, np.inf)          # time of the next order arrival
+
+        # statistical counters of every pair
+        self.areaHolding = np.zeros(self.numPairs)
+        self.areaShortage = np.zeros(self.numPairs)
+        self.totalOrderingCost = np.zeros(self.numPairs)
+
+    def __perPair__(self, value, dtype=float):
+        return np.broadcast_to(np.asarray(value, dtype=dtype), self.shape).ravel().copy()
+
+    def __expon__(self, mean):
+        return -mean * np.log(self.generator.lcgrand_block(STREAM_INTER_DEMAND, mean.size))
+
+    def __uniform__(self, a, b):
+        return a + (b - a) * self.generator.lcgrand_block(STREAM_LAG, a.size)
+
+    def __reset__(self):
+        self.inventoryLevel = self.initialInventoryLevel.copy()
+        self.amount[:] = 0
+        self.timeLastEvent[:] = 0.0
+        self.nextArrival[:] = np.inf
+        self.nextDemand = self.__expon__(self.meanInterDemand)
+
+        self.areaHolding[:] = 0.0
+        self.areaShortage[:] = 0.0
+        self.totalOrderingCost[:] = 0.0
+
+    def __updateTimeAvgStats__(self, pairs, time):
+        timeSinceLastEvent = time - self.timeLastEvent[pairs]
+        self.timeLastEvent[pairs] = time
+        level = self.inventoryLevel[pairs]
+        self.areaHolding[pairs] += np.maximum(level, 0) * timeSinceLastEvent
+        self.areaShortage[pairs] += np.maximum(-level, 0) * timeSinceLastEvent
+
+    def __advance__(self, endTime):
+        # process every event up to and including endTime
+        while True:
+            nextTime = np.minimum(self.nextDemand, self.nextArrival)
+            pairs = np.flatnonzero(nextTime <= endTime)
+            if pairs.size == 0:
+                break
+            time = nextTime[pairs]
+            self.__updateTimeAvgStats__(pairs, time)
+
+            # order arrivals (an arrival wins a tie with a demand)
+            isArrival = self.nextArrival[pairs] <= self.nextDemand[pairs]
+            arrivals = pairs[isArrival]
+            self.inventoryLevel[arrivals] += self.amount[arrivals]
+            self.nextArrival[arrivals] = np.inf
+
+            # demands
+            demands = pairs[~isArrival]
+            self.inventoryLevel[demands] -= self.demandSampler.sampleBlock(self.generator, STREAM_DEMAND_SIZE, demands.size)
+            self.nextDemand[demands] = time[~isArrival] + self.__expon__(self.meanInterDemand[demands])
+
+        self.__updateTimeAvgStats__(slice(None), endTime)
+
+    def __evaluate__(self, time):
+        pairs = np.flatnonzero(self.inventoryLevel < self.smalls)
+        self.amount[pairs] = self.bigs[pairs] - self.inventoryLevel[pairs]
+        self.totalOrderingCost[pairs] += self.setupCost[pairs] + self.incrementalCost[pairs] * self.amount[pairs]
+        self.nextArrival[pairs] = time + self.__uniform__(self.minLag[pairs], self.maxLag[pairs])
+
+    def simulate(self):
+        self.__reset__()
+        for month in range(self.numMonths):
+            self.__evaluate__(float(month))
+            self.__advance__(month + 1.0)
+
+    def averageCosts(self):
+        # average monthly ordering, holding and shortage cost of every pair,
+        # each as an array of shape (numSkus, numLocations)
+        avgOrderingCost = self.totalOrderingCost / self.numMonths
+        avgHoldingCost = self.areaHolding * self.holdingCost / self.numMonths
+        avgShortageCost = self.areaShortage * self.shortageCost / self.numMonths
+        return avgOrderingCost.reshape(self.shape), avgHoldingCost.reshape(self.shape), avgShortageCost.reshape(self.shape)
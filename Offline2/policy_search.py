@@ -0,0 +1,118 @@
+# Search for the best (s, S) policy of the inventory system by successive
+# halving, instead of simulating an explicit list of policies.
+#
+# Every candidate policy gets a small budget of simulated months in the first
+# rung; only the best 1/eta of them go on to the next rung, where the budget
+# per policy is eta times larger.  The budget first lengthens the run (up to
+# numMonths) and then adds replications, so the last rungs compare a few
+# policies at full length with several replications each.
+#
+# All evaluations use common random numbers: replication r of every policy
+# at a given run length sees the same demands (substream r of the seed), so
+# the differences between policies are much less noisy than the costs
+# themselves.  Each (policy, run length, replication) is cached on disk by
+# sweep_runner, so the later rungs reuse the full-length replications of the
+# earlier ones, and repeated or overlapping searches reuse everything.
+#
+#     ranking, simulatedMonths = searchPolicies(inventorySystem, range(100), range(100))
+#     ranking[0]      # PolicyEstimate(s, S, interval) of the best policy
+
+# Path: policy_search.py
+
+import math
+import os
+import sys
+from collections import namedtuple
+
+# the shared simulation kernel (simkernel) is in the repository root
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from simkernel import Lcgrand
+from simkernel.output_analysis import RunningStat
+from simkernel.sweep_runner import CACHE_DIR, run_sweep
+from inventory_system import InventorySystem
+
+# estimated average total cost of a policy (an output_analysis.Interval)
+PolicyEstimate = namedtuple("PolicyEstimate", ["s", "S", "interval"])
+
+# survivors of the last rung, best first, and the policy-months evaluated
+# (including the ones found in the cache)
+SearchResult = namedtuple("SearchResult", ["ranking", "simulatedMonths"])
+
+# InventorySystem arguments copied from the template system
+MODEL_ARGUMENTS = ["initialInventoryLevel", "numMonths", "numValuesDemand", "meanInterDemand", "setupCost", "incrementalCost", "holdingCost", "shortageCost", "minLag", "maxLag", "probDistribDemand", "antithetic", "warmupDetection", "warmupBatchSize", "warmupMinBatches"]
+
+
+# average total cost of one policy in one replication; point holds the
+# InventorySystem constructor arguments except numPolicy and policies, and
+# s, S and the replication index; seeds is [seed], the one seed the
+# replications are substreams of (see Lcgrand.lcgrand_spawn)
+def evaluatePoint(point, seeds):
+    point = dict(point)
+    s, S, replication = point.pop("s"), point.pop("S"), point.pop("replication")
+    inventorySystem = InventorySystem(numPolicy=1, policies=[[s, S]], commonRandomNumbers=True, **point)
+    seed, = seeds
+    inventorySystem.generator = Lcgrand().lcgrand_spawn(seed, replication)
+    s, S, avgOrderingCost, avgHoldingCost, avgShortageCost = inventorySystem.policyCosts()[0]
+    return avgOrderingCost + avgHoldingCost + avgShortageCost
+
+
+# budget of every rung as (run length in months, number of replications);
+# the budget grows by eta per rung until maxReplications full-length runs
+def rungSchedule(numMonths, minMonths, eta, maxReplications):
+    # a budget that does not grow would never reach the last rung
+    if eta < 2:
+        raise ValueError("eta must be at least 2, got %r" % eta)
+    if minMonths < 1:
+        raise ValueError("minMonths must be at least 1, got %r" % minMonths)
+    if maxReplications < 1:
+        raise ValueError("maxReplications must be at least 1, got %r" % maxReplications)
+    if numMonths < 1:
+        raise ValueError("numMonths must be at least 1, got %r" % numMonths)
+    schedule = []
+    budget = minMonths
+    while True:
+        months = min(numMonths, budget)
+        replications = min(maxReplications, budget // months)
+        schedule.append((months, replications))
+        if months == numMonths and replications == maxReplications:
+            return schedule
+        budget *= eta
+
+
+def searchPolicies(inventorySystem, sValues, SValues, eta=4, minMonths=6, maxReplications=16, keep=1, seed=None, cacheDir=CACHE_DIR, numWorkers=None):
+    # successive halving over every pair with s < S; inventorySystem supplies
+    # the model (its policies are ignored) and keep is the number of
+    # policies ranked in the result; the replications are substreams of seed
+    # (default: the current seed of stream 1 of inventorySystem)
+    model = {name: getattr(inventorySystem, name) for name in MODEL_ARGUMENTS}
+    model["demandSampling"] = inventorySystem.demandSampler.method
+    seeds = [inventorySystem.generator.lcgrandgt(1) if seed is None else seed]
+
+    candidates = [(s, S) for s in sValues for S in SValues if s < S]
+    costs = {}              # (s, S, months, replication) -> average total cost
+    simulatedMonths = 0
+    schedule = rungSchedule(inventorySystem.numMonths, minMonths, eta, maxReplications)
+
+    for rung, (months, replications) in enumerate(schedule):
+        wanted = [(s, S, months, replication) for s, S in candidates for replication in range(replications)]
+        missing = [key for key in wanted if key not in costs]
+        points = [dict(model, numMonths=months, s=s, S=S, replication=replication) for s, S, months, replication in missing]
+        for key, cost in zip(missing, run_sweep(evaluatePoint, points, seeds, cacheDir, numWorkers)):
+            costs[key] = cost
+        simulatedMonths += len(missing) * months
+
+        estimates = []
+        for s, S in candidates:
+            stat = RunningStat()
+            for replication in range(replications):
+                stat.add(costs[(s, S, months, replication)])
+            estimates.append(PolicyEstimate(s, S, stat.interval()))
+        estimates.sort(key=lambda estimate: estimate.interval.mean)
+
+        if rung == len(schedule) - 1:
+            return SearchResult(estimates[:keep], simulatedMonths)
+        survivors = max(keep, math.ceil(len(candidates) / eta))
+        candidates = [(estimate.s, estimate.S) for estimate in estimates[:survivors]]
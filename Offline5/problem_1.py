@@ -1,6 +1,9 @@
 import numpy as np
 
 SIM_NUM = 100000
+NUM_GENERATIONS = 10
+NUM_STATES = 5          # P(0) ... P(3) and P(4), where 4 stands for "4 or more"
+CHUNK_SIZE = 100000     # simulations advanced together, bounds the memory use
 
 def format_result(probabilities):
     """Format the result of the simulation
@@ -15,40 +18,53 @@ def format_result(probabilities):
         for j in range(probabilities.shape[1]):
             result += f'P({j}) = {probabilities[i][j]}\n'
         result += '\n'
-        
+
     return result
-    
+
+
+def simulate(p, sim_num=SIM_NUM, num_generations=NUM_GENERATIONS, num_states=NUM_STATES, chunk_size=CHUNK_SIZE, rng=None):
+    """Simulate the branching process for a whole chunk of simulations at once
+
+    The offspring of n neutrons follow a multinomial(n, p) distribution over
+    the number of neutrons that produce 0, 1, 2, ... new neutrons, so one
+    generation of every simulation in the chunk is a single draw. Only the
+    histogram of neutron counts is kept, so the memory does not grow with
+    sim_num.
+    Args:
+        p: p[i] is the probability that a neutron produces i new neutrons
+        sim_num: number of simulations
+        num_generations: number of generations per simulation
+        num_states: number of histogram bins, the last one is "that many or more"
+        chunk_size: number of simulations advanced together
+        rng: numpy random Generator, a fresh one is created if None
+    Returns:
+        2D array, entry [gen][j] is the probability of j neutrons in generation gen+1
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    p = np.asarray(p, dtype=float)
+    offspring = np.arange(p.size)
+    counts = np.zeros((num_generations, num_states), dtype=np.int64)
+
+    for start in range(0, sim_num, chunk_size):
+        size = min(chunk_size, sim_num - start)
+        neutrons = np.ones(size, dtype=np.int64)
+        for gen in range(num_generations):
+            # extinct simulations stay extinct, so only the alive ones are drawn
+            neutrons = neutrons[neutrons > 0]
+            neutrons = rng.multinomial(neutrons, p) @ offspring
+            counts[gen] += np.bincount(np.minimum(neutrons, num_states - 1), minlength=num_states)
+            counts[gen, 0] += size - neutrons.size
+
+    return counts / sim_num
 
 
 # define the probabilities
 p = [0.2126 * (0.5893)**(i-1) for i in range(4)]
 p = [1 - sum(p[1:])] + p[1:]  # Adjust for p0
 
-# initialize the result of the simulation
-result = np.zeros((10, 5, SIM_NUM))
-
-# run the simulation
-for sim in range(SIM_NUM):
-    neutrons = 1
-    for gen in range(10):
-        new_neutrons = 0
-        for _ in range(neutrons):
-            # determine the number of new neutrons
-            r = np.random.rand()
-            for i in range(4):
-                if r < sum(p[:i+1]):
-                    new_neutrons += i
-                    break
-            
-        # update the number of neutrons
-        neutrons = new_neutrons
-        if neutrons < 4:
-            result[gen, neutrons, sim] = 1
-        else:
-            result[gen, 4, sim] = 1
-            
-# calculate the probability of extinction
-prob = result.mean(axis=2)
-
-result = format_result(prob)
-print(result)
\ No newline at end of file
+if __name__ == '__main__':
+    # run the simulation and calculate the probabilities
+    prob = simulate(p)
+
+    result = format_result(prob)
+    print(result)
@@ -2,40 +2,82 @@ import numpy as np
 import matplotlib.pyplot as plt
 
 NUM_SIMULATIONS = 10000
+CHUNK_ELEMENTS = 4000000    # candidates held in memory at once
 
-def simulate(n, m, s):
-    success = 0
-    for _ in range(NUM_SIMULATIONS):  # number of simulations
-        # generate rank of candidates
-        candidates = np.random.permutation(n) + 1 # add 1 to start from 1
-        # find the standard from first m candidates
-        standard = min(candidates[:m]) if m > 0 else n + 1
-        # find the first candidate that is better than the standard
-        sample = candidates[m:]
-        selected_candidate = None
-        for candidate in sample:
-            if candidate < standard:
-                selected_candidate = candidate
-                break
-        # check if the selected candidate is better than s
-        if selected_candidate is not None and selected_candidate <= s:
-            success += 1
-                
-    return success / NUM_SIMULATIONS
-
-
-n = 100
-success_criteria = [1, 3, 5, 10]
-
-for s in success_criteria:
-    success_rates = [simulate(n, m, s) for m in range(n)]
-    # print(success_rates)
-    plt.plot(success_rates, label=f's={s}')
-
-plt.xlabel('Sample Size (m)')
-plt.ylabel('Success Rate')
-plt.legend()
-# save the plot
-plt.savefig('success_rate.png')
-# close the plot
-plt.close()
+def simulate(n, success_criteria, num_simulations=NUM_SIMULATIONS, rng=None):
+    """Estimate the success rate of every sample size m for every s at once
+
+    After a sample of size m, the selected candidate is the first candidate
+    better than everyone before it (a left-to-right minimum) at position m
+    or later. So one prefix-minimum pass and one backward "next record"
+    pass over a matrix of permutations cover all m together.
+    Args:
+        n: number of candidates
+        success_criteria: list of s values, success means the selected rank is <= s
+        num_simulations: number of random permutations
+        rng: numpy random Generator, a fresh one is created if None
+    Returns:
+        2D array, entry [k][m] is the success rate for s = success_criteria[k] and sample size m
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    success_criteria = np.asarray(success_criteria)
+    success = np.zeros((success_criteria.size, n), dtype=np.int64)
+    positions = np.arange(n)
+    chunk_size = max(1, CHUNK_ELEMENTS // n)
+
+    for start in range(0, num_simulations, chunk_size):
+        size = min(chunk_size, num_simulations - start)
+        # generate rank of candidates, one permutation per row
+        candidates = rng.permuted(np.tile(np.arange(1, n + 1), (size, 1)), axis=1)
+        # position of the first record at or after each position (n if none)
+        is_record = candidates == np.minimum.accumulate(candidates, axis=1)
+        record_positions = np.where(is_record, positions, n)
+        next_record = np.minimum.accumulate(record_positions[:, ::-1], axis=1)[:, ::-1]
+        # selected candidate for every m, n + 1 when nobody is selected
+        candidates = np.concatenate((candidates, np.full((size, 1), n + 1)), axis=1)
+        selected = np.take_along_axis(candidates, next_record, axis=1)
+        success += (selected[None, :, :] <= success_criteria[:, None, None]).sum(axis=1)
+
+    return success / num_simulations
+
+
+def success_probability(n, s):
+    """Exact success rate of every sample size m
+
+    For m >= 1 the first record after the sample is at position j with
+    probability m / (j (j - 1)), and the best of j random candidates has
+    rank <= s with probability 1 - C(n - s, j) / C(n, j).
+    Args:
+        n: number of candidates
+        s: success means the selected rank is <= s
+    Returns:
+        1D array, entry [m] is the success rate for sample size m
+    """
+    j = np.arange(1, n + 1)
+    # C(n - s, j) / C(n, j) as a running product, exactly 0 once j > n - s
+    ratio = np.cumprod(np.maximum(n - s - j + 1, 0) / (n - j + 1))
+    best_within_s = 1.0 - ratio
+    weights = np.zeros(n + 1)
+    weights[2:] = best_within_s[1:] / (j[1:] * (j[1:] - 1))
+    # tail[k] = sum of weights[j] for j >= k
+    tail = np.cumsum(weights[::-1])[::-1]
+    rates = np.arange(n) * tail[1:]
+    rates[0] = s / n
+    return rates
+
+
+if __name__ == '__main__':
+    n = 100
+    success_criteria = [1, 3, 5, 10]
+
+    success_rates = simulate(n, success_criteria)
+    for k, s in enumerate(success_criteria):
+        plt.plot(success_rates[k], label=f's={s}')
+
+    plt.xlabel('Sample Size (m)')
+    plt.ylabel('Success Rate')
+    plt.legend()
+    # save the plot
+    plt.savefig('success_rate.png')
+    # close the plot
+    plt.close()
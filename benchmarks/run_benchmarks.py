@@ -0,0 +1,477 @@
+'''
+Benchmark and golden-output regression suite for all simulators.
+
+    python benchmarks/run_benchmarks.py [case ...] [--quick]
+
+Cases: lcg, queue, inventory, service, problem_1, problem_2 (all by default).
+Every case runs in its own interpreter with its Offline directory on the
+path, so the models of different directories never share an interpreter. It checks
+the outputs against the golden files and measures throughput for growing
+problem sizes. The results are saved to benchmarks/results/<time>.json and
+compared with the previous saved run.
+
+Golden checks:
+  queue      Offline1/IOs/io1-io3. These results.txt files were written with
+             single precision, so numbers must agree within five units of the
+             last printed digit; event_orders.txt must match exactly
+             (ignoring trailing blank lines).  The Lindley fast path
+             (lindley_queue.py) must give the event-driven Result within
+             1e-9 relative for the same streams.  A run resumed from a
+             checkpoint taken at 3/5 of its events must end with the Result
+             of the uninterrupted run.  A parameter sweep (sweep_runner) must
+             give the direct results both when it computes them and when it
+             reads them from its cache, compute only the points added to a
+             cached sweep, and not reuse the results of other seeds.
+  inventory  benchmarks/golden/inventory_*.txt, the output of the original
+             implementation for the Law & Kelton example; must match exactly.
+             The example resumed from a checkpoint taken at 3/5 of its events
+             (in the middle of a policy) must report the same rows.  The
+             inverse demand sampler must give the values of the original
+             linear scan on random tables, the frequencies of the alias
+             sampler must agree with the table within 5 standard errors, and
+             block sampling must equal scalar sampling for both.  With
+             common random numbers and with antithetic runs, the row of every
+             policy must be the same with the policies in reverse order and
+             in parallel mode, and an antithetic pair resumed from a
+             checkpoint in its second run must report the same row.
+  lcg        lcgrand_block must equal repeated lcgrand calls, and the
+             numbers of a stream of a spawned substream (its whole draw
+             budget) must not meet the first numbers of the next stream or
+             of the next substream.
+  service    the replications streamed by simkernel.service must equal
+             direct runs of the queue with the same seeds.  Its throughput
+             is in scenarios per second through one warm service, next to
+             one interpreter per scenario.
+  problem_1  Offline5/prob-1-output.txt came from an unseeded run, so every
+             probability must agree within 5 standard errors.
+  problem_2  the simulated success rates must agree with the exact ones
+             within 5 standard errors.
+'''
+
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+GOLDEN_DIR = os.path.join(ROOT, 'benchmarks', 'golden')
+
+# Offline directory every case imports from
+CASE_DIRS = {
+    'lcg': 'Offline1',
+    'queue': 'Offline1',
+    'inventory': 'Offline2',
+    'service': 'Offline1',
+    'problem_1': 'Offline5',
+    'problem_2': 'Offline5',
+}
+
+
+# best wall time of repeat calls of function
+def best_time(function, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_lcg(quick):
+    from simkernel import Lcgrand
+    scalar, block = Lcgrand(), Lcgrand()
+    golden = all([scalar.lcgrand(stream) for _ in range(10007)] == list(block.lcgrand_block(stream, 10007)) for stream in (1, 2, 99))
+
+    import numpy as np
+    from simkernel.lcg_rand import SUBSTREAM_LENGTH
+    disjoint = True
+    for substream in (0, 1, 80):
+        children = [Lcgrand().lcgrand_spawn(Lcgrand().zrng[1], j) for j in range(substream, min(substream + 2, 81))]
+        for stream in (0, 1, 2, 3, 98):
+            budget = _states(children[0], stream, SUBSTREAM_LENGTH)
+            disjoint = disjoint and not np.isin(_states(children[0], stream + 1, 1000), budget).any()
+            if len(children) > 1:
+                disjoint = disjoint and not np.isin(_states(children[1], stream, 1000), budget).any()
+
+    throughput = []
+    for n in ([10 ** 4, 10 ** 5] if quick else [10 ** 4, 10 ** 5, 10 ** 6]):
+        generator = Lcgrand()
+        scalar_time = best_time(lambda: [generator.lcgrand(1) for _ in range(n)], 1)
+        block_time = best_time(lambda: generator.lcgrand_block(1, n))
+        throughput.append({'n': n, 'scalar_per_sec': n / scalar_time, 'block_per_sec': n / block_time})
+    return {'golden': {'block_equals_scalar': golden, 'substreams_disjoint': disjoint}, 'throughput': throughput}
+
+
+def bench_queue(quick):
+    import io
+    from single_server_queueing_system import SingleServerQueue, read_params, run_point, write_params, write_result
+    from event_trace import TextTrace
+    from lindley_queue import LindleyQueue
+    from simkernel import Lcgrand
+
+    golden = {}
+    for case_dir in sorted(glob.glob(os.path.join(ROOT, 'Offline1', 'IOs', 'io*'))):
+        params = read_params(os.path.join(case_dir, 'in.txt'))
+        trace_path = os.path.join(RESULTS_DIR, 'event_orders.tmp')
+        output = io.StringIO()
+        write_params(output, params)
+        with TextTrace(trace_path) as trace:
+            write_result(output, SingleServerQueue(trace=trace).run(params))
+        with open(os.path.join(case_dir, 'results.txt')) as expected_file:
+            results_ok = _same_numbers(output.getvalue(), expected_file.read(), 5e-6)
+        with open(trace_path) as trace_file, open(os.path.join(case_dir, 'event_orders.txt')) as expected_file:
+            events_ok = trace_file.read().rstrip() == expected_file.read().rstrip()
+        os.remove(trace_path)
+        golden[os.path.basename(case_dir)] = results_ok and events_ok
+
+    lindley_ok = True
+    for params in [(1.0, 0.5, 1000), (1.0, 0.9, 100000), (1.0, 1.2, 20000)]:
+        events = SingleServerQueue(Lcgrand(), arrival_stream=1, service_stream=2).run(params)
+        lindley = LindleyQueue(Lcgrand(), 1, 2, chunk_size=4096).run(params)
+        lindley_ok = lindley_ok and all(abs(x - y) <= 1e-9 * abs(x) for x, y in zip(events, lindley))
+    golden['lindley_matches_events'] = lindley_ok
+
+    # the last checkpoint of a run is at 3/5 of its events, where an
+    # interrupted run would have left it; resumed from there, the run must
+    # end with the Result of the uninterrupted run
+    params = (1.0, 0.9, 30000)
+    queue = SingleServerQueue()
+    expected = queue.run(params)
+    checkpoint_path = os.path.join(RESULTS_DIR, 'checkpoint.tmp')
+    SingleServerQueue().run(params, checkpoint_path, queue.event_count * 3 // 5)
+    golden['checkpoint_resume'] = SingleServerQueue.from_checkpoint(checkpoint_path).resume() == expected
+    os.remove(checkpoint_path)
+
+    golden['sweep_cache'] = _check_sweep_cache(run_point)
+
+    throughput = []
+    for customers in ([10 ** 3, 10 ** 4] if quick else [10 ** 3, 10 ** 4, 10 ** 5]):
+        elapsed = best_time(lambda: SingleServerQueue().run((0.95, 0.9, customers)))
+        throughput.append({'customers': customers, 'customers_per_sec': customers / elapsed})
+    for customers in ([10 ** 5, 10 ** 6] if quick else [10 ** 5, 10 ** 6, 10 ** 7]):
+        elapsed = best_time(lambda: LindleyQueue().run((0.95, 0.9, customers)))
+        throughput.append({'customers': customers, 'lindley_customers_per_sec': customers / elapsed})
+    return {'golden': golden, 'throughput': throughput}
+
+
+def bench_inventory(quick):
+    import importlib
+    driver = importlib.import_module('1805086')
+
+    with open(os.path.join(GOLDEN_DIR, 'inventory_in.txt')) as infile:
+        inventory_system = driver.createInventorySystem(infile)
+    import io
+    output = io.StringIO()
+    driver.writeParameters(inventory_system, output)
+    inventory_system.simulate()
+    driver.writeResults(inventory_system, output)
+    with open(os.path.join(GOLDEN_DIR, 'inventory_out.txt')) as expected_file:
+        golden = {'law_kelton_example': output.getvalue() == expected_file.read()}
+
+    # inventory system of the golden input, with InventorySystem options
+    def create(**options):
+        with open(os.path.join(GOLDEN_DIR, 'inventory_in.txt')) as infile:
+            return driver.createInventorySystem(infile, **options)
+
+    golden['checkpoint_resume'] = _resumes(create, 3 / 5)
+    golden['inverse_equals_scan'], golden['alias_frequencies'] = _check_samplers()
+
+    # common random numbers and antithetic runs: the row of a policy must not
+    # depend on the other policies, their order or the process it ran in
+    crn_ok = True
+    rows = {}
+    for mode in ('commonRandomNumbers', 'antithetic'):
+        forward, backward, parallel = create(**{mode: True}), create(**{mode: True}), create(**{mode: True})
+        backward.policies.reverse()
+        for system in (forward, backward):
+            system.simulate()
+        parallel.simulate(parallel=True, numWorkers=2)
+        rows[mode] = dict(zip(map(tuple, forward.policies), forward.reportRows))
+        crn_ok = crn_ok and rows[mode] == dict(zip(map(tuple, backward.policies), backward.reportRows)) and parallel.report_string == forward.report_string
+    golden['crn_rows_independent'] = crn_ok and rows['commonRandomNumbers'] != rows['antithetic']
+
+    # a checkpoint taken in the second run of an antithetic pair
+    def first_policy(**options):
+        system = create(**options)
+        system.numPolicy = 1
+        return system
+    golden['antithetic_resume'] = _resumes(lambda: first_policy(antithetic=True), 3 / 4)
+
+    throughput = []
+    for months in ([120, 1200] if quick else [120, 1200, 12000]):
+        for num_policies in (1, 9):
+            def run():
+                with open(os.path.join(GOLDEN_DIR, 'inventory_in.txt')) as infile:
+                    system = driver.createInventorySystem(infile)
+                system.numMonths = months
+                system.numPolicy = num_policies
+                system.simulate()
+            elapsed = best_time(run, 1)
+            throughput.append({'months': months, 'policies': num_policies, 'policy_months_per_sec': months * num_policies / elapsed})
+    return {'golden': golden, 'throughput': throughput}
+
+
+def bench_service(quick):
+    from single_server_queueing_system import run_point
+    from simkernel import Lcgrand
+
+    point = {'mean_interarrival': 1.0, 'mean_service': 0.5, 'num_delays_required': 1000}
+
+    # messages of the service for one JSON line per job
+    def serve(jobs):
+        command = [sys.executable, '-m', 'simkernel.service', '--workers', '2']
+        completed = subprocess.run(command, cwd=ROOT, input=''.join(json.dumps(job) + '\n' for job in jobs), capture_output=True, text=True, check=True)
+        return [json.loads(line) for line in completed.stdout.splitlines()]
+
+    messages = serve([{'id': 'golden', 'model': 'queue', 'point': point, 'replications': 4}])
+    results = {message['replication']: message['result'] for message in messages if 'result' in message}
+    expected = {i: run_point(point, Lcgrand().lcgrand_spawn(Lcgrand().zrng[1], i).zrng) for i in range(4)}
+    golden = {'replications_equal_direct_runs': results == expected and messages[-1].get('done') is True}
+
+    throughput = []
+    for scenarios in ([100, 1000] if quick else [100, 1000, 10000]):
+        elapsed = best_time(lambda: serve([{'id': i, 'model': 'queue', 'point': point} for i in range(scenarios)]), 1)
+        throughput.append({'scenarios': scenarios, 'scenarios_per_sec': scenarios / elapsed})
+    # the same scenario with a fresh interpreter each time
+    command = [sys.executable, '-c', 'from single_server_queueing_system import run_point; from simkernel import Lcgrand; run_point(%r, Lcgrand().zrng)' % point]
+    scenarios = 5
+    elapsed = best_time(lambda: [subprocess.run(command, check=True) for _ in range(scenarios)], 1)
+    throughput.append({'scenarios': scenarios, 'process_per_scenario_per_sec': scenarios / elapsed})
+    return {'golden': golden, 'throughput': throughput}
+
+
+def bench_problem_1(quick):
+    import numpy as np
+    from problem_1 import simulate, p
+
+    expected = _read_probabilities(os.path.join(ROOT, 'Offline5', 'prob-1-output.txt'))
+    sim_num = 100000
+    probabilities = simulate(p, sim_num=sim_num, rng=np.random.default_rng(412))
+    # both sides are estimates from sim_num simulations
+    error = np.sqrt(2 * expected * (1 - expected) / sim_num) + 1e-12
+    golden = {'prob_1_output': bool(np.all(np.abs(probabilities - expected) <= 5 * error + 1e-9))}
+
+    throughput = []
+    for size in ([10 ** 4, 10 ** 5] if quick else [10 ** 4, 10 ** 5, 10 ** 6]):
+        elapsed = best_time(lambda: simulate(p, sim_num=size))
+        throughput.append({'sim_num': size, 'simulations_per_sec': size / elapsed})
+    return {'golden': golden, 'throughput': throughput}
+
+
+def bench_problem_2(quick):
+    import numpy as np
+    from problem_2 import simulate, success_probability
+
+    n, num_simulations, criteria = 50, 20000, [1, 3, 5, 10]
+    rates = simulate(n, criteria, num_simulations, np.random.default_rng(412))
+    exact = np.array([success_probability(n, s) for s in criteria])
+    error = np.sqrt(exact * (1 - exact) / num_simulations) + 1e-12
+    golden = {'matches_exact': bool(np.all(np.abs(rates - exact) <= 5 * error + 1e-9))}
+
+    throughput = []
+    for size in ([100, 300] if quick else [100, 300, 1000]):
+        elapsed = best_time(lambda: simulate(size, criteria), 1)
+        throughput.append({'n': size, 'permutations_per_sec': 10000 / elapsed})
+    return {'golden': golden, 'throughput': throughput}
+
+
+# integer states behind the next n numbers of a stream
+def _states(generator, stream, n):
+    import numpy as np
+    states = np.empty(n, dtype=np.int64)
+    z = generator.zrng[stream]
+    for start in range(0, n, 2 ** 16):
+        count = min(2 ** 16, n - start)
+        states[start:start + count] = generator.__powers__(count) * z % generator.MODLUS
+        z = int(states[start + count - 1])
+    return states
+
+
+# run_sweep of the queue with a fresh cache: the computed results (misses)
+# and the cached ones (hits) must equal direct runs, a second sweep with an
+# added point must only write the file of the new point, and other seeds
+# must not hit the cache of the first ones
+def _check_sweep_cache(run_point):
+    import shutil
+    from simkernel import Lcgrand
+    from simkernel.sweep_runner import grid, run_sweep
+    cache_dir = os.path.join(RESULTS_DIR, 'sweep_cache.tmp')
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    points = grid(mean_interarrival=[1.0], mean_service=[0.5, 0.8, 0.9], num_delays_required=[2000])
+    seeds, other_seeds = Lcgrand().zrng, Lcgrand().lcgrand_spawn(Lcgrand().zrng[1], 1).zrng
+    expected = [run_point(point, seeds) for point in points]
+    try:
+        ok = run_sweep(run_point, points[:2], seeds, cache_dir, 2) == expected[:2]
+        cached = {path: os.stat(path).st_mtime_ns for path in glob.glob(os.path.join(cache_dir, '*', '*.json'))}
+        ok = ok and run_sweep(run_point, points, seeds, cache_dir, 2) == expected
+        written = {path: os.stat(path).st_mtime_ns for path in glob.glob(os.path.join(cache_dir, '*', '*.json'))}
+        ok = ok and len(cached) == 2 and len(written) == 3 and all(written[path] == cached[path] for path in cached)
+        return ok and run_sweep(run_point, points[:1], other_seeds, cache_dir, 2) == [run_point(points[0], other_seeds)] != expected[:1]
+    finally:
+        shutil.rmtree(cache_dir)
+
+
+# a sequential simulate() of create() whose last checkpoint is at fraction
+# of its events, restored and resumed from there, reports the same rows as
+# the uninterrupted run
+def _resumes(create, fraction):
+    from inventory_system import InventorySystem
+    expected = create()
+    expected.simulate()
+    checkpoint_path = os.path.join(RESULTS_DIR, 'checkpoint.tmp')
+    create().simulate(checkpointPath=checkpoint_path, checkpointInterval=int(expected.event_count * fraction))
+    resumed = InventorySystem.fromCheckpoint(checkpoint_path)
+    os.remove(checkpoint_path)
+    resumed.resume()
+    return resumed.report_string == expected.report_string
+
+
+# the demand size of the original inventory system: a linear scan of the
+# cumulative table
+def _scan(probDistrib, numValues, u):
+    i = 0
+    for i in range(1, numValues + 1):
+        if u <= probDistrib[i]:
+            break
+    return i
+
+
+# DiscreteSampler on random cumulative tables (with zero probabilities and a
+# last value below 1): the inverse method must give the value of the scan for
+# every uniform, including the table values themselves; the frequencies of
+# the alias method must agree with the table within 5 standard errors; for
+# both, sampleBlock must equal repeated sample calls
+def _check_samplers():
+    import numpy as np
+    from discrete_sampler import DiscreteSampler
+    from simkernel import Lcgrand
+    rng = np.random.default_rng(412)
+    inverse_ok = alias_ok = True
+    for numValues in (1, 2, 4, 17, 300):
+        pmf = rng.dirichlet(np.ones(numValues)) * (rng.random(numValues) < 0.8)
+        probDistrib = [0.0] + list(np.cumsum(pmf / max(pmf.sum(), 1e-300)) * 0.9999)
+        for method in ('inverse', 'alias'):
+            sampler = DiscreteSampler(probDistrib, numValues, method)
+            scalar, block = Lcgrand(), Lcgrand()
+            uniforms = [scalar.lcgrand(1) for _ in range(20000)]
+            values = [sampler.sample(u) for u in uniforms]
+            same_block = list(sampler.sampleBlock(block, 1, len(uniforms))) == values
+            if method == 'inverse':
+                uniforms += probDistrib[1:]
+                inverse_ok = inverse_ok and same_block and all(sampler.sample(u) == _scan(probDistrib, numValues, u) for u in uniforms)
+            else:
+                expected = np.diff(probDistrib)
+                expected[-1] += 1.0 - probDistrib[-1]
+                frequencies = np.bincount(values, minlength=numValues + 1)[1:] / len(values)
+                error = np.sqrt(expected * (1 - expected) / len(values)) + 1e-12
+                alias_ok = alias_ok and same_block and bool(np.all(np.abs(frequencies - expected) <= 5 * error))
+    return inverse_ok, alias_ok
+
+
+# numbers in two texts are equal within tolerance and the words are the same
+def _same_numbers(text, expected, tolerance):
+    words, expected_words = text.split(), expected.split()
+    if len(words) != len(expected_words):
+        return False
+    for word, expected_word in zip(words, expected_words):
+        try:
+            if abs(float(word) - float(expected_word)) > tolerance:
+                return False
+        except ValueError:
+            if word != expected_word:
+                return False
+    return True
+
+
+# P(j) values of a problem_1 output, as a (generations, states) array
+def _read_probabilities(path):
+    import numpy as np
+    generations = []
+    with open(path) as output_file:
+        for line in output_file:
+            if line.startswith('Generation-'):
+                generations.append([])
+            elif line.startswith('P('):
+                generations[-1].append(float(line.split('=')[1]))
+    return np.array(generations)
+
+
+BENCHMARKS = {
+    'lcg': bench_lcg,
+    'queue': bench_queue,
+    'inventory': bench_inventory,
+    'service': bench_service,
+    'problem_1': bench_problem_1,
+    'problem_2': bench_problem_2,
+}
+
+
+# run one case in a fresh interpreter with its Offline directory on the path
+def run_case(case, quick):
+    command = [sys.executable, os.path.abspath(__file__), '--worker', case] + (['--quick'] if quick else [])
+    completed = subprocess.run(command, cwd=os.path.join(ROOT, CASE_DIRS[case]), capture_output=True, text=True)
+    if completed.returncode != 0:
+        return {'error': completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else 'exit code %d' % completed.returncode}
+    return json.loads(completed.stdout)
+
+
+def previous_results():
+    paths = sorted(glob.glob(os.path.join(RESULTS_DIR, '*.json')))
+    if not paths:
+        return None
+    with open(paths[-1]) as results_file:
+        return json.load(results_file)
+
+
+def print_report(results, previous):
+    for case, result in results.items():
+        print('== %s' % case)
+        if 'error' in result:
+            print('   ERROR: %s' % result['error'])
+            continue
+        for name, ok in result['golden'].items():
+            print('   golden %-22s %s' % (name, 'ok' if ok else 'FAILED'))
+        old_rows = previous.get(case, {}).get('throughput', []) if previous else []
+        for i, row in enumerate(result['throughput']):
+            text = '   ' + '  '.join('%s=%.4g' % item for item in row.items())
+            if i < len(old_rows) and old_rows[i].keys() == row.keys():
+                rate = [key for key in row if key.endswith('per_sec')][-1]
+                text += '  (%.2fx previous)' % (row[rate] / old_rows[i][rate])
+            print(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('cases', nargs='*', metavar='case', help='cases to run: %s (default: all)' % ', '.join(BENCHMARKS))
+    parser.add_argument('--quick', action='store_true', help='smaller problem sizes')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    for case in args.cases:
+        if case not in BENCHMARKS:
+            parser.error('unknown case: %s' % case)
+
+    if args.worker is not None:
+        sys.path.insert(0, os.getcwd())
+        sys.path.append(ROOT)
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        print(json.dumps(BENCHMARKS[args.worker](args.quick)))
+        return
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    results = {case: run_case(case, args.quick) for case in (args.cases or BENCHMARKS)}
+    previous = previous_results()
+    print_report(results, previous)
+
+    with open(os.path.join(RESULTS_DIR, time.strftime('%Y%m%d-%H%M%S') + '.json'), 'w') as results_file:
+        json.dump(results, results_file, indent=2)
+
+    failed = any('error' in result or not all(result['golden'].values()) for result in results.values())
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,10 @@
+# Discrete-event simulation kernel shared by the Offline models.
+#
+# The Offline directories are plain script directories, so their modules put
+# the repository root on sys.path before importing simkernel.
+
+from .lcg_rand import Lcgrand
+from .event_calendar import Event, EventCalendar, LinearCalendar
+from .accumulators import TimeWeighted, TimeWeightedHistogram, Histogram, P2Quantile, Tally, Trajectory
+from .kernel import Simulation
+from .checkpoint import save_checkpoint, load_checkpoint
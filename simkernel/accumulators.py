@@ -0,0 +1,276 @@
+# Time-weighted statistical accumulators.
+#
+# A TimeWeighted holds the area under a piecewise-constant function of the
+# simulation clock, such as the number in queue or the inventory level.  The
+# kernel updates every accumulator of a model once per event with the value
+# the function had since the previous event, so time averages are
+# area / elapsed time.
+#
+# The other classes give distributions in a single run with fixed memory:
+#   Histogram             fixed bins, weighted by time or by observation
+#   TimeWeightedHistogram a TimeWeighted that also keeps a Histogram
+#   P2Quantile            streaming quantile estimate (Jain & Chlamtac's P²)
+#   Tally                 observation statistics (e.g. delays) with a
+#                         histogram and P² quantiles
+#   Trajectory            the model state sampled over time, in preallocated
+#                         arrays that are thinned when full
+
+import bisect
+import math
+
+import numpy as np
+
+
+class TimeWeighted:
+    def __init__(self):
+        self.area = 0.0         # integral of the value over simulated time
+        self.start_time = 0.0   # time the area is integrated from
+
+    def update(self, value, elapsed):
+        self.area += value * elapsed
+
+    # restart the integration at start_time (the end of a warm-up period)
+    def reset(self, start_time=0.0):
+        self.area = 0.0
+        self.start_time = start_time
+
+    def mean(self, duration):
+        return self.area / duration
+
+    # average from start_time to now
+    def time_average(self, now):
+        return self.area / (now - self.start_time)
+
+
+class Histogram:
+    # num_bins bins of equal width over [low, high), one bin for values below
+    # low and one for values at or above high.  With discrete=True the values
+    # are integers in bins of width 1, and quantiles are bin values instead of
+    # being interpolated inside a bin.
+    def __init__(self, low, high, num_bins, discrete=False):
+        self.low = low
+        self.high = high
+        self.num_bins = num_bins
+        self.width = (high - low) / num_bins
+        self.discrete = discrete
+        self.weights = [0.0] * (num_bins + 2)   # underflow, bins, overflow
+        self.total = 0.0
+
+    def add(self, value, weight=1.0):
+        if value < self.low:
+            i = 0
+        elif value >= self.high:
+            i = self.num_bins + 1
+        else:
+            i = int((value - self.low) / self.width) + 1
+        self.weights[i] += weight
+        self.total += weight
+
+    def reset(self):
+        self.weights = [0.0] * (self.num_bins + 2)
+        self.total = 0.0
+
+    def edges(self):
+        return np.linspace(self.low, self.high, self.num_bins + 1)
+
+    # share of the total weight in every bin, underflow and overflow first and last
+    def fractions(self):
+        weights = np.array(self.weights)
+        return weights / self.total if self.total > 0 else weights
+
+    def quantile(self, p):
+        # low or high if the quantile is in the underflow or overflow bin
+        if self.total <= 0:
+            return math.nan
+        target = p * self.total
+        cumulative = self.weights[0]
+        if cumulative >= target and cumulative > 0:
+            return self.low
+        for i in range(1, self.num_bins + 1):
+            weight = self.weights[i]
+            if weight > 0 and cumulative + weight >= target:
+                left = self.low + (i - 1) * self.width
+                if self.discrete:
+                    return left
+                return left + self.width * (target - cumulative) / weight
+            cumulative += weight
+        return self.high
+
+    def summary(self, quantiles=()):
+        return {
+            'low': self.low,
+            'high': self.high,
+            'width': self.width,
+            'underflow': self.weights[0] / self.total if self.total > 0 else 0.0,
+            'overflow': self.weights[-1] / self.total if self.total > 0 else 0.0,
+            'fractions': self.fractions()[1:-1].tolist(),
+            'quantiles': {str(p): self.quantile(p) for p in quantiles},
+        }
+
+
+class TimeWeightedHistogram(TimeWeighted):
+    # area and time-weighted distribution of the value
+    def __init__(self, histogram, quantiles=(0.5, 0.9, 0.99)):
+        TimeWeighted.__init__(self)
+        self.histogram = histogram
+        self.quantiles = quantiles
+
+    def update(self, value, elapsed):
+        self.area += value * elapsed
+        self.histogram.add(value, elapsed)
+
+    def reset(self, start_time=0.0):
+        TimeWeighted.reset(self, start_time)
+        self.histogram.reset()
+
+    def summary(self, duration):
+        summary = self.histogram.summary(self.quantiles)
+        summary['mean'] = self.mean(duration) if duration > 0 else 0.0
+        return summary
+
+
+class P2Quantile:
+    # p-quantile of a stream of observations from five markers (the minimum,
+    # the p/2, p and (1+p)/2 quantiles and the maximum), without storing them
+    def __init__(self, p):
+        self.p = p
+        self.count = 0
+        self.heights = []                                       # marker heights
+        self.positions = [1, 2, 3, 4, 5]                        # actual marker positions
+        self.desired = [1.0, 1.0 + 2 * p, 1.0 + 4 * p, 3.0 + 2 * p, 5.0]    # desired marker positions
+        self.increments = [0.0, p / 2, p, (1.0 + p) / 2, 1.0]
+
+    def add(self, x):
+        self.count += 1
+        q = self.heights
+        if self.count <= 5:
+            bisect.insort(q, x)
+            return
+
+        # cell k of the new observation, q[k] <= x < q[k + 1]
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = bisect.bisect_right(q, x) - 1
+
+        n = self.positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # move the middle markers that are off their desired positions by one
+        for i in range(1, 4):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                height = q[i] + d / (n[i + 1] - n[i - 1]) * ((n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                                                            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    def value(self):
+        if self.count == 0:
+            return math.nan
+        if self.count <= 5:
+            # exact quantile of the few observations
+            return self.heights[min(int(self.p * self.count), self.count - 1)]
+        return self.heights[2]
+
+    def reset(self):
+        self.__init__(self.p)
+
+
+class Tally:
+    # statistics of observations such as delays: count, mean, extremes, and
+    # optionally a histogram and P² estimates of some quantiles
+    def __init__(self, histogram=None, quantiles=()):
+        self.histogram = histogram
+        self.sketches = [P2Quantile(p) for p in quantiles]
+        self.reset()
+
+    def add(self, x):
+        self.count += 1
+        self.total += x
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+        if self.histogram is not None:
+            self.histogram.add(x)
+        for sketch in self.sketches:
+            sketch.add(x)
+
+    def reset(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        if self.histogram is not None:
+            self.histogram.reset()
+        for sketch in self.sketches:
+            sketch.reset()
+
+    def summary(self):
+        summary = {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+            'min': self.min if self.count else 0.0,
+            'max': self.max if self.count else 0.0,
+            'quantiles': {str(sketch.p): sketch.value() for sketch in self.sketches},
+        }
+        if self.histogram is not None:
+            summary['histogram'] = self.histogram.summary()
+        return summary
+
+
+class Trajectory:
+    # the model state sampled at most every interval simulated time units.
+    # The samples go into arrays of capacity rows allocated up front; when
+    # they are full every other sample is dropped and the interval doubles,
+    # so a run of any length fits and stays evenly sampled.
+    def __init__(self, capacity, interval, width):
+        self.capacity = capacity
+        self.initial_interval = interval
+        self.times = np.empty(capacity)
+        self.values = np.empty((capacity, width))
+        self.reset()
+
+    def record(self, time, values):
+        if time < self.next_time:
+            return
+        if self.size == self.capacity:
+            self.__thin__()
+            if time < self.next_time:
+                return
+        self.times[self.size] = time
+        self.values[self.size] = values
+        self.size += 1
+        self.next_time = time + self.interval
+
+    def __thin__(self):
+        kept = (self.size + 1) // 2
+        self.times[:kept] = self.times[0:self.size:2]
+        self.values[:kept] = self.values[0:self.size:2]
+        self.size = kept
+        self.interval *= 2
+        self.next_time = self.times[kept - 1] + self.interval
+
+    def reset(self):
+        self.size = 0
+        self.interval = self.initial_interval
+        self.next_time = 0.0
+
+    def to_arrays(self):
+        return self.times[:self.size].copy(), self.values[:self.size].copy()
+
+    # write the samples as CSV: time and one column per value
+    def save(self, path, names):
+        data = np.column_stack([self.times[:self.size], self.values[:self.size]])
+        np.savetxt(path, data, delimiter=',', header=','.join(['time'] + list(names)), comments='', fmt='%.10g')
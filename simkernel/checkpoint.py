@@ -0,0 +1,33 @@
+# Checkpoints of long simulation runs.
+#
+# A checkpoint holds the complete state of a model between two events as a
+# dict (the event list, the queue, the statistical accumulators and the
+# Lcgrand seeds).  The dict is pickled, compressed with zlib and written
+# behind a short header.  The file is written to a temporary name first and
+# then renamed, so a run killed while writing leaves the previous checkpoint
+# intact.  Floats are stored exactly, so a resumed run is bit-identical to
+# an uninterrupted one.
+
+import os
+import pickle
+import zlib
+
+# header of every checkpoint file
+MAGIC = b'SIMCKPT1'
+
+
+def save_checkpoint(state, path):
+    data = zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL))
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as checkpoint_file:
+        checkpoint_file.write(MAGIC)
+        checkpoint_file.write(data)
+    os.replace(temp_path, path)
+
+
+def load_checkpoint(path):
+    with open(path, 'rb') as checkpoint_file:
+        data = checkpoint_file.read()
+    if not data.startswith(MAGIC):
+        raise ValueError('not a simulation checkpoint: ' + path)
+    return pickle.loads(zlib.decompress(data[len(MAGIC):]))
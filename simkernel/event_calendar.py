@@ -0,0 +1,160 @@
+# Future event list for the discrete-event simulations.
+#
+# Pending events are kept in a binary heap ordered by (time, event type,
+# scheduling order).  Ties are therefore broken exactly like the old linear
+# scan over time_next_event: the event with the lower type number wins, and
+# events of the same type fire in the order they were scheduled.
+#
+# schedule() returns the Event itself, which is the handle used by cancel()
+# and reschedule().  Cancelled entries are only marked dead and are dropped
+# when they reach the top of the heap, so every operation is O(log n).
+#
+# LinearCalendar is the time_next_event array of the original models behind
+# the same interface: one slot per event type, at most one pending event per
+# type, and pop() scans the slots.  With a few event types the scan (min()
+# and index() of a list of floats) is cheaper than the heap operations, so
+# models with a small fixed set of events (the single-server queue, the
+# inventory system) use it; models with many pending events of one type
+# (queueing_network) keep EventCalendar.
+
+import heapq
+
+
+class Event:
+    def __init__(self, time, event_type, data=None):
+        self.time = time                # time at which the event occurs
+        self.event_type = event_type    # event type as used by the model
+        self.data = data                # model-specific payload (e.g. which server)
+        self.entry = None               # heap entry while the event is pending
+
+    def pending(self):
+        return self.entry is not None
+
+
+class EventCalendar:
+    def __init__(self):
+        self.heap = []              # entries [time, event_type, order, event]
+        self.order = 0              # number of entries pushed so far
+        self.num_pending = 0        # number of live (not cancelled) events
+
+    def __len__(self):
+        return self.num_pending
+
+    def schedule(self, time, event_type, data=None):
+        event = Event(time, event_type, data)
+        self.num_pending += 1
+        self.__push__(event)
+        return event
+
+    def cancel(self, event):
+        # cancelling an event that already fired (or was cancelled) is a no-op
+        if event.entry is None:
+            return
+        event.entry[3] = None
+        event.entry = None
+        self.num_pending -= 1
+
+    def reschedule(self, event, time):
+        # move a pending event, or put a fired/cancelled event back on the list
+        if event.entry is None:
+            self.num_pending += 1
+        else:
+            event.entry[3] = None
+        event.time = time
+        self.__push__(event)
+        return event
+
+    def pop(self):
+        # remove and return the next event, or None if no event is pending
+        heap = self.heap
+        while heap:
+            event = heapq.heappop(heap)[3]
+            if event is not None:
+                event.entry = None
+                self.num_pending -= 1
+                return event
+        return None
+
+    def peek_time(self):
+        # time of the next event without removing it (1.0e+30 if none)
+        heap = self.heap
+        while heap and heap[0][3] is None:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else 1.0e+30
+
+    def clear(self):
+        for entry in self.heap:
+            if entry[3] is not None:
+                entry[3].entry = None
+        self.heap = []
+        self.num_pending = 0
+
+    def __push__(self, event):
+        entry = [event.time, event.event_type, self.order, event]
+        self.order += 1
+        event.entry = entry
+        heapq.heappush(self.heap, entry)
+        # rebuild the heap once dead entries outnumber the live ones
+        if len(self.heap) > 2 * self.num_pending + 64:
+            self.heap = [e for e in self.heap if e[3] is not None]
+            heapq.heapify(self.heap)
+
+
+class LinearCalendar:
+    def __init__(self, num_event_types):
+        # event types are 1..num_event_types (0 is allowed, as in the arrays)
+        self.times = [1.0e+30] * (num_event_types + 1)     # time of the pending event of every type
+        self.events = [None] * (num_event_types + 1)       # pending Event of every type
+
+    def __len__(self):
+        return len(self.events) - self.events.count(None)
+
+    def schedule(self, time, event_type, data=None):
+        return self.__put__(Event(time, event_type, data))
+
+    def cancel(self, event):
+        # cancelling an event that already fired (or was cancelled) is a no-op
+        if event.entry is None:
+            return
+        self.events[event.entry] = None
+        self.times[event.entry] = 1.0e+30
+        event.entry = None
+
+    def reschedule(self, event, time):
+        # move a pending event, or put a fired/cancelled event back on the list
+        event.time = time
+        if event.entry is None:
+            return self.__put__(event)
+        self.times[event.entry] = time
+        return event
+
+    def pop(self):
+        # remove and return the next event, or None if no event is pending;
+        # like the original scan, the lowest event type wins a tie
+        times = self.times
+        event_type = times.index(min(times))
+        event = self.events[event_type]
+        if event is not None:
+            self.events[event_type] = None
+            times[event_type] = 1.0e+30
+            event.entry = None
+        return event
+
+    def peek_time(self):
+        # time of the next event without removing it (1.0e+30 if none)
+        return min(self.times)
+
+    def clear(self):
+        for event in self.events:
+            if event is not None:
+                event.entry = None
+        self.times = [1.0e+30] * len(self.times)
+        self.events = [None] * len(self.events)
+
+    def __put__(self, event):
+        if self.events[event.event_type] is not None:
+            raise ValueError('an event of type %d is already pending' % event.event_type)
+        event.entry = event.event_type
+        self.events[event.event_type] = event
+        self.times[event.event_type] = event.time
+        return event
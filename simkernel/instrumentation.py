@@ -0,0 +1,125 @@
+# Hot-path instrumentation for the simulations.
+#
+# A model that is given a Profiler swaps its timing, statistics and event
+# functions for timed wrappers, and its random number generator and trace
+# sink for counting proxies, for the length of a run.  Without a Profiler
+# none of this is installed, so the event loop runs exactly as before.
+#
+# Handler times are inclusive: the time of an arrival includes the random
+# numbers it draws and the trace records it writes, which are also reported
+# on their own under "rng" and "trace".
+
+import json
+import time
+
+
+class Profiler:
+    def __init__(self):
+        self.event_counts = {}      # event name -> number of events
+        self.event_times = {}       # event name -> seconds spent in its handler
+        self.section_times = {}     # section name -> seconds spent in it
+        self.rng_draws = {}         # stream -> number of random numbers drawn
+        self.peaks = {}             # watched quantity -> largest value seen after an event
+        self.watches = {}           # watched quantity -> function returning its value
+        self.wall_time = 0.0        # seconds spent inside the event loop
+        self.started = 0.0
+
+    def start(self):
+        self.started = time.perf_counter()
+
+    def stop(self):
+        self.wall_time += time.perf_counter() - self.started
+
+    # record the peak of getter() after every event
+    def watch(self, name, getter):
+        self.watches[name] = getter
+        self.peaks.setdefault(name, 0)
+
+    def timed(self, section, function):
+        self.section_times.setdefault(section, 0.0)
+        times = self.section_times
+
+        def wrapper(*args):
+            start = time.perf_counter()
+            result = function(*args)
+            times[section] += time.perf_counter() - start
+            return result
+        return wrapper
+
+    def timed_event(self, name, handler):
+        self.event_counts.setdefault(name, 0)
+        self.event_times.setdefault(name, 0.0)
+
+        def wrapper():
+            start = time.perf_counter()
+            handler()
+            self.event_times[name] += time.perf_counter() - start
+            self.event_counts[name] += 1
+            for watched, getter in self.watches.items():
+                value = getter()
+                if value > self.peaks[watched]:
+                    self.peaks[watched] = value
+        return wrapper
+
+    def instrument_rng(self, generator):
+        return CountingLcgrand(generator, self)
+
+    def instrument_trace(self, trace):
+        return TimedTrace(trace, self) if trace is not None else None
+
+    def report(self):
+        num_events = sum(self.event_counts.values())
+        return {
+            'wall_time': self.wall_time,
+            'events': num_events,
+            'events_per_sec': num_events / self.wall_time if self.wall_time > 0 else 0.0,
+            'event_types': {name: {'count': self.event_counts[name], 'time': self.event_times[name]} for name in self.event_counts},
+            'sections': dict(self.section_times),
+            'rng_draws': {str(stream): count for stream, count in sorted(self.rng_draws.items())},
+            'peaks': dict(self.peaks),
+        }
+
+    def to_json(self):
+        return json.dumps(self.report(), indent=2)
+
+
+# Lcgrand proxy that counts and times the numbers drawn from every stream
+class CountingLcgrand:
+    def __init__(self, generator, profiler):
+        self.generator = generator
+        self.profiler = profiler
+        profiler.section_times.setdefault('rng', 0.0)
+
+    def lcgrand(self, stream):
+        start = time.perf_counter()
+        u = self.generator.lcgrand(stream)
+        self.profiler.section_times['rng'] += time.perf_counter() - start
+        self.profiler.rng_draws[stream] = self.profiler.rng_draws.get(stream, 0) + 1
+        return u
+
+    def lcgrand_block(self, stream, n):
+        start = time.perf_counter()
+        block = self.generator.lcgrand_block(stream, n)
+        self.profiler.section_times['rng'] += time.perf_counter() - start
+        self.profiler.rng_draws[stream] = self.profiler.rng_draws.get(stream, 0) + n
+        return block
+
+    def __getattr__(self, name):
+        # methods are looked up once; data such as zrng stays the generator's
+        value = getattr(self.generator, name)
+        if callable(value):
+            setattr(self, name, value)
+        return value
+
+
+# trace sink proxy that times every call
+class TimedTrace:
+    def __init__(self, trace, profiler):
+        self.trace = trace
+        self.profiler = profiler
+
+    def __getattr__(self, name):
+        # build the timed wrapper once; later lookups find the attribute
+        wrapper = self.profiler.timed('trace', getattr(self.trace, name))
+        setattr(self, name, wrapper)
+        return wrapper
@@ -0,0 +1,204 @@
+# Discrete-event simulation kernel shared by the models.
+#
+# A model subclasses Simulation and supplies its event handlers, the values
+# of its time-weighted accumulators and its stopping condition.  The kernel
+# owns everything else: the clock, the event calendar, the random number
+# streams, the time-average statistics, handler dispatch through a table
+# indexed by event type, periodic checkpoints and profiling.
+#
+#     class Model(Simulation):
+#         def __handlers__(self):
+#             return {ARRIVAL: ('arrival', self.__arrive__), ...}
+#         def __levels__(self):
+#             return (self.num_in_q,)
+#         def __finished__(self):
+#             return self.num_custs_delayed >= self.num_delays_required
+#
+# The generic statistics update zips the accumulators with __levels__() on
+# every event; a model can return a faster updater from
+# __time_avg_updater__, chosen once per run, with its own areas inlined.
+#
+# Every event runs timing -> update_time_avg_stats -> handler, exactly like
+# the loops of the original models, so their results are unchanged.
+
+import math
+
+from .lcg_rand import Lcgrand
+from .event_calendar import EventCalendar
+from .accumulators import Trajectory
+from .checkpoint import save_checkpoint
+
+
+class Simulation:
+    # attributes that are not part of a checkpoint
+    TRANSIENT = ('lcg', 'profiler')
+
+    # names of the values returned by __levels__ (columns of the trajectory)
+    LEVELS = ()
+
+    def __init__(self, lcg=None, calendar=None, profiler=None):
+        self.lcg = lcg if lcg is not None else Lcgrand()            # random number streams
+        self.calendar = calendar if calendar is not None else EventCalendar()   # future event list
+        self.profiler = profiler            # instrumentation.Profiler (None: no instrumentation)
+
+        self.sim_time = 0.0                 # simulation clock
+        self.time_last_event = 0.0          # time of the last event
+        self.next_event_type = 0            # type of the event being processed
+        self.event_data = None              # data of the event being processed
+        self.event_count = 0                # number of events processed
+        self.accumulators = []              # TimeWeighted accumulators, in the order of __levels__()
+        self.trajectory = None              # sampled __levels__() over time (None: not recorded)
+        self.complement = False             # draw 1 - u instead of u (antithetic runs)
+
+        self.checkpoint_path = None         # file the state is saved to (None: no checkpoints)
+        self.checkpoint_interval = 0        # number of events between two checkpoints
+
+    # event type -> (name, handler); the name is used by the profiler
+    def __handlers__(self):
+        return {}
+
+    # current values of the functions the accumulators integrate
+    def __levels__(self):
+        return ()
+
+    # True once the run is over; checked before every event
+    def __finished__(self):
+        return False
+
+    # quantity name -> function returning it; the profiler records its peak
+    def __watches__(self):
+        return {}
+
+    # swap the streams (and any other sink) for counting proxies
+    def __instrument__(self, profiler):
+        self.lcg = profiler.instrument_rng(self.lcg)
+
+    def __uninstrument__(self):
+        self.lcg = self.lcg.generator
+
+    def __random__(self, stream):
+        u = self.lcg.lcgrand(stream)
+        return 1.0 - u if self.complement else u
+
+    def __expon__(self, mean, stream=1):
+        return -mean * math.log(self.__random__(stream))
+
+    def __uniform__(self, a, b, stream=1):
+        return a + (b - a) * self.__random__(stream)
+
+    # restart the clock, the calendar and the accumulators
+    def __reset_clock__(self):
+        self.sim_time = 0.0
+        self.time_last_event = 0.0
+        self.calendar.clear()
+        self.__reset_statistics__()
+        if self.trajectory is not None:
+            self.trajectory.reset()
+
+    # restart the time-weighted accumulators at the current time, e.g. at the
+    # end of a warm-up period; the averages then cover the time since
+    def __reset_statistics__(self):
+        for accumulator in self.accumulators:
+            accumulator.reset(self.sim_time)
+
+    # sample __levels__() at most every interval time units into capacity
+    # preallocated rows (thinned when full) during the following runs
+    def record_trajectory(self, capacity=10000, interval=1.0):
+        self.trajectory = Trajectory(capacity, interval, len(self.LEVELS))
+
+    def save_trajectory(self, path):
+        self.trajectory.save(path, self.LEVELS)
+
+    def __timing__(self):
+        # Determine the next event to occur.
+        event = self.calendar.pop()
+
+        # Check to see whether the event list is empty.
+        if event is None:
+            raise RuntimeError('Event list empty at time ' + str(self.sim_time))
+
+        # The event list is not empty, so advance the simulation clock.
+        self.next_event_type = event.event_type
+        self.event_data = event.data
+        self.sim_time = event.time
+        self.event_count += 1
+
+    def __update_time_avg_stats__(self):
+        # Compute time since last event, and update last-event-time marker.
+        time_since_last_event = self.sim_time - self.time_last_event
+        self.time_last_event = self.sim_time
+
+        # Update the area under every time-weighted function.
+        for accumulator, value in zip(self.accumulators, self.__levels__()):
+            accumulator.update(value, time_since_last_event)
+
+    # the statistics update of the next run; models override it with one
+    # that updates their plain TimeWeighted areas inline
+    def __time_avg_updater__(self):
+        return self.__update_time_avg_stats__
+
+    def __event_functions__(self):
+        # timing, statistics and dispatch table of the loop; with a profiler
+        # they are timed wrappers, and the streams are a counting proxy
+        timing = self.__timing__
+        update_time_avg_stats = self.__time_avg_updater__()
+        handlers = self.__handlers__()
+        profiler = self.profiler
+        if profiler is not None:
+            self.__instrument__(profiler)
+            for name, getter in self.__watches__().items():
+                profiler.watch(name, getter)
+            profiler.watch('pending_events', lambda: len(self.calendar))
+            timing = profiler.timed('timing', timing)
+            update_time_avg_stats = profiler.timed('update_time_avg_stats', update_time_avg_stats)
+            handlers = {event_type: (name, profiler.timed_event(name, handler)) for event_type, (name, handler) in handlers.items()}
+
+        # the trajectory gets the levels of the interval that just ended,
+        # only when it is recorded
+        if self.trajectory is not None:
+            update_areas = update_time_avg_stats
+            record = self.trajectory.record
+
+            def update_time_avg_stats():
+                update_areas()
+                record(self.sim_time, self.__levels__())
+
+        # list indexed by event type
+        table = [None] * (max(handlers, default=0) + 1)
+        for event_type, (name, handler) in handlers.items():
+            table[event_type] = handler
+        return timing, update_time_avg_stats, table
+
+    def __run_events__(self):
+        timing, update_time_avg_stats, table = self.__event_functions__()
+        if self.profiler is not None:
+            self.profiler.start()
+        try:
+            while not self.__finished__():
+                # Determine the next event.
+                timing()
+
+                # Update time-average statistical accumulators.
+                update_time_avg_stats()
+
+                # Invoke the appropriate event function.
+                table[self.next_event_type]()
+
+                if self.checkpoint_path is not None and self.event_count % self.checkpoint_interval == 0:
+                    save_checkpoint(self.__snapshot__(), self.checkpoint_path)
+        finally:
+            if self.profiler is not None:
+                self.profiler.stop()
+                self.__uninstrument__()
+
+    def __snapshot__(self):
+        # complete state between two events, with the seeds of every stream
+        state = {name: value for name, value in self.__dict__.items() if name not in self.TRANSIENT}
+        state['zrng'] = [self.lcg.lcgrandgt(stream) for stream in range(len(self.lcg.zrng))]
+        return state
+
+    def __restore__(self, state):
+        state = dict(state)
+        for stream, zset in enumerate(state.pop('zrng')):
+            self.lcg.lcgrandst(zset, stream)
+        self.__dict__.update(state)
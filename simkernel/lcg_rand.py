@@ -0,0 +1,129 @@
+# Class to generate random numbers using the linear congruential generator
+# from L'Ecuyer (1990).
+#
+# The generator uses a modulus of 2^31 - 1, a multiplier of 24112, and
+# an additive constant of 26143.
+#
+# The seed must be an integer between 1 and 2^31 - 2.  The first random
+# number generated is always equal to the seed.
+#
+# The generator returns a pseudo-random number between 0 and 1.
+#
+# 
+import numpy as np
+
+# default number of values every stream of a substream handed out by
+# lcgrand_spawn may draw; the period 2^31 - 2 split over 100 streams leaves
+# room for 81 substreams of 2^18 values each
+SUBSTREAM_LENGTH = 2 ** 18
+
+# largest power table kept by lcgrand_block; longer blocks are generated in
+# chunks of this size, each one continuing from the last number of the previous
+POWERS_LENGTH = 2 ** 16
+
+
+class Lcgrand:
+    def __init__(self):
+        self.MODLUS = 2 ** 31 - 1
+        self.MULT1 = 24112
+        self.MULT2 = 26143
+        # one lcgrand step multiplies by MULT1 and then by MULT2, i.e. by MULT
+        self.MULT = self.MULT1 * self.MULT2 % self.MODLUS
+        self.zrng = [1, 1973272912, 281629770, 20006270, 1280689831, 2096730329, 1933576050, 913566091, 246780520, 1363774876, 604901985, 1511192140, 1259851944, 824064364, 150493284, 242708531, 75253171, 1964472944, 1202299975, 233217322, 1911216000, 726370533, 403498145, 993232223, 1103205531, 762430696, 1922803170, 1385516923, 76271663, 413682397, 726466604, 336157058, 1432650381, 1120463904, 595778810, 877722890, 1046574445, 68911991, 2088367019, 748545416, 622401386, 2122378830, 640690903, 1774806513, 2132545692, 2079249579, 78130110, 852776735, 1187867272, 1351423507, 1645973084, 1997049139, 922510944, 2045512870, 898585771, 243649545, 1004818771, 773686062, 403188473, 372279877, 1901633463, 498067494, 2087759558, 493157915, 597104727, 1530940798, 1814496276, 536444882, 1663153658, 855503735, 67784357, 1432404475, 619691088, 119025595, 880802310, 176192644, 1116780070, 277854671, 1366580350, 1142483975, 2026948561, 1053920743, 786262391, 1792203830, 1494667770, 1923011392, 1433700034, 1244184613, 1147297105, 539712780, 1545929719, 190641742, 1645390429, 264907697, 620389253, 1502074852, 927711160, 364849192, 2049576050, 638580085, 547070247]
+        self.stream = 0
+        self.powers = np.empty(0, dtype=np.int64)    # cached MULT^1 .. MULT^k (mod MODLUS)
+
+    def lcgrand(self, stream):
+        self.stream = stream % self.zrng.__len__()
+        zi = self.zrng[self.stream]
+        lowprd = (zi & 0xFFFF) * self.MULT1
+        hi31 = (zi >> 16) * self.MULT1 + (lowprd >> 16)
+        zi = ((lowprd & 0xFFFF) - self.MODLUS) + ((hi31 & 0x7FFF) << 16) + (hi31 >> 15)
+        if (zi < 0): 
+            zi += self.MODLUS
+        lowprd = (zi & 0xFFFF) * self.MULT2
+        hi31 = (zi >> 16) * self.MULT2 + (lowprd >> 16)
+        zi = ((lowprd & 0xFFFF) - self.MODLUS) + ((hi31 & 0x7FFF) << 16) + (hi31 >> 15)
+        if zi < 0: 
+            zi += self.MODLUS
+        self.zrng[self.stream] = zi
+        return (zi >> 7 | 1) / 16777216.0
+
+    def lcgrandst(self, zset, stream):
+        self.zrng[stream] = zset
+
+    def lcgrandgt(self, stream):
+        return self.zrng[stream]
+
+    def lcgrand_block(self, stream, n):
+        # Generate the next n numbers of the stream at once.  The k-th number
+        # of the block comes from MULT^k * z (mod MODLUS), so it is identical
+        # to calling lcgrand n times.  Every product is below 2^62, so int64
+        # arithmetic is exact.
+        self.stream = stream % self.zrng.__len__()
+        if n <= 0:
+            return np.empty(0)
+        powers = self.__powers__(min(n, POWERS_LENGTH))
+        z = self.zrng[self.stream]
+        if n <= POWERS_LENGTH:
+            zi = powers * z % self.MODLUS
+            self.zrng[self.stream] = int(zi[-1])
+            return (zi >> 7 | 1) / 16777216.0
+        block = np.empty(n)
+        for start in range(0, n, POWERS_LENGTH):
+            count = min(POWERS_LENGTH, n - start)
+            zi = powers[:count] * z % self.MODLUS
+            z = int(zi[-1])
+            block[start:start + count] = (zi >> 7 | 1) / 16777216.0
+        self.zrng[self.stream] = z
+        return block
+
+    def lcgrand_skip(self, stream, k):
+        # Advance the stream by k numbers without generating them.  k steps
+        # multiply the seed by MULT^k (mod MODLUS), which pow() computes by
+        # repeated squaring in O(log k).
+        stream = stream % self.zrng.__len__()
+        self.zrng[stream] = pow(self.MULT, k, self.MODLUS) * self.zrng[stream] % self.MODLUS
+
+    def lcgrand_spawn(self, seed, substream, length=SUBSTREAM_LENGTH):
+        # Return a new generator for substream `substream` of the one sequence
+        # that starts at `seed`; the seeds of this generator play no part.
+        # Stream k of substream j starts k * spacing + j * length numbers
+        # past seed, where spacing = (MODLUS - 1) // number of streams.  As
+        # long as every stream draws at most length numbers, no two (stream,
+        # substream) pairs share a number, so replication i can simply use
+        # lcgrand_spawn(seed, i) whatever streams the model uses.  A run that
+        # needs more numbers per stream must pass a larger length, which
+        # leaves fewer substreams.  (Jumping ahead from every stream's own
+        # seed would not do: the default seeds are only 100,000 numbers
+        # apart in the same sequence.)
+        spacing = (self.MODLUS - 1) // self.zrng.__len__()
+        if substream < 0 or (substream + 1) * length > spacing:
+            raise ValueError('substream %d of length %d does not fit in %d numbers per stream' % (substream, length, spacing))
+        child = Lcgrand()
+        child.zrng = [pow(self.MULT, k * spacing + substream * length, self.MODLUS) * seed % self.MODLUS for k in range(self.zrng.__len__())]
+        return child
+
+    # the power table is a cache, so copies sent to other processes leave it out
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['powers'] = np.empty(0, dtype=np.int64)
+        return state
+
+    def __powers__(self, n):
+        # Extend the cached power table by doubling: the second half of the
+        # table is the first half multiplied by MULT^(length of first half).
+        filled = self.powers.__len__()
+        if filled >= n:
+            return self.powers[:n]
+        powers = np.empty(n, dtype=np.int64)
+        powers[:filled] = self.powers
+        if filled == 0:
+            powers[0] = self.MULT
+            filled = 1
+        while filled < n:
+            count = min(filled, n - filled)
+            powers[filled:filled + count] = powers[:count] * int(powers[filled - 1]) % self.MODLUS
+            filled += count
+        self.powers = powers
+        return powers
@@ -0,0 +1,236 @@
+# Output analysis for the simulations (Law & Kelton, chapter 9).
+#
+# RunningStat keeps a streaming (Welford) mean and variance of independent
+# observations, such as one output per replication.  BatchMeans groups the
+# correlated observations of one long run into consecutive batches and
+# treats the batch means as independent observations.  Both give a Student t
+# confidence interval, and SequentialStop says when its relative half-width
+# is small enough, so a run can stop as soon as the target precision is
+# reached instead of after a fixed number of customers or months.
+#
+# MserWarmup finds the end of the initial transient of a run online (MSER-5),
+# so the models can restart their statistics there instead of averaging in
+# the bias of the empty-and-idle or initial-inventory start.
+
+import math
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+# confidence interval of a mean estimated from count observations
+Interval = namedtuple('Interval', ['mean', 'half_width', 'level', 'count'])
+
+
+class RunningStat:
+    def __init__(self):
+        self.count = 0          # number of observations
+        self.mean = 0.0         # mean of the observations
+        self.m2 = 0.0           # sum of squared deviations from the mean
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def interval(self, level=0.95):
+        if self.count < 2:
+            return Interval(self.mean, math.inf, level, self.count)
+        half_width = t_quantile((1.0 + level) / 2.0, self.count - 1) * math.sqrt(self.variance() / self.count)
+        return Interval(self.mean, half_width, level, self.count)
+
+
+class BatchMeans:
+    def __init__(self, batch_size):
+        self.batch_size = batch_size    # observations per batch
+        self.batch_sum = 0.0            # sum of the observations of the open batch
+        self.batch_count = 0            # observations in the open batch
+        self.batches = RunningStat()    # statistics of the completed batch means
+
+    # add one observation, returns True when it completed a batch
+    def add(self, x):
+        self.batch_sum += x
+        self.batch_count += 1
+        if self.batch_count < self.batch_size:
+            return False
+        self.batches.add(self.batch_sum / self.batch_size)
+        self.batch_sum = 0.0
+        self.batch_count = 0
+        return True
+
+    @property
+    def count(self):
+        return self.batches.count
+
+    def interval(self, level=0.95):
+        return self.batches.interval(level)
+
+
+class SequentialStop:
+    def __init__(self, rel_precision, level=0.95, min_count=10):
+        self.rel_precision = rel_precision  # target half-width relative to the mean
+        self.level = level                  # confidence level of the interval
+        self.min_count = min_count          # observations needed before stopping
+
+    # stat is a RunningStat or a BatchMeans
+    def satisfied(self, stat):
+        if stat.count < self.min_count:
+            return False
+        interval = stat.interval(self.level)
+        return interval.half_width <= self.rel_precision * abs(interval.mean)
+
+
+class MserWarmup:
+    # MSER-m truncation point (White, 1997) of a stream of observations,
+    # computed while they arrive.  The observations go into batches of
+    # batch_size and the truncation point is the number d of leading batch
+    # means Z_1..Z_d whose deletion minimizes
+    #     MSER(d) = sum_{i > d} (Z_i - mean_{i > d} Z)^2 / (n - d)^2
+    # It is accepted when d lies in the first half of the n batches; until
+    # then the run is still in its transient.  The test is repeated whenever
+    # n has grown by a quarter, from min_batches on, and when capacity batch
+    # means are stored neighbouring batches are merged, so memory is fixed.
+    def __init__(self, batch_size=5, min_batches=20, capacity=1000):
+        # merging pairs of neighbouring batches needs an even capacity
+        if capacity < 2 or capacity % 2 != 0:
+            raise ValueError('capacity must be an even number of batches, got %r' % (capacity,))
+        self.initial_batch_size = batch_size
+        self.min_batches = min_batches
+        self.capacity = capacity
+        self.reset()
+
+    def reset(self):
+        self.batch_size = self.initial_batch_size   # observations per batch
+        self.batch_sum = 0.0            # sum of the observations of the open batch
+        self.batch_count = 0            # observations in the open batch
+        self.means = []                 # completed batch means
+        self.count = 0                  # observations added
+        self.next_check = self.min_batches  # number of batches of the next test
+        self.truncation = None          # observations in the transient (None: not detected yet)
+        self.deleted = None             # observations added up to the detection
+
+    @property
+    def detected(self):
+        return self.deleted is not None
+
+    # add one observation; returns True for the one at which the end of the
+    # transient is detected, and ignores every observation after it
+    def add(self, x):
+        if self.deleted is not None:
+            return False
+        self.count += 1
+        self.batch_sum += x
+        self.batch_count += 1
+        if self.batch_count < self.batch_size:
+            return False
+        self.means.append(self.batch_sum / self.batch_size)
+        self.batch_sum = 0.0
+        self.batch_count = 0
+        if len(self.means) == self.capacity:
+            self.__merge__()
+        if len(self.means) < self.next_check:
+            return False
+
+        n = len(self.means)
+        self.next_check = n + max(1, n // 4)
+        d = mser_truncation(self.means)
+        if d > n // 2:
+            return False
+        self.truncation = d * self.batch_size
+        self.deleted = self.count
+        return True
+
+    def __merge__(self):
+        # pairs of batches become one batch of twice the size
+        self.means = [(self.means[i] + self.means[i + 1]) / 2.0 for i in range(0, len(self.means) - 1, 2)]
+        self.batch_size *= 2
+        self.next_check = max(self.min_batches, self.next_check // 2)
+
+    def summary(self):
+        return {'truncation': self.truncation, 'deleted': self.deleted, 'observations': self.count, 'batch_size': self.batch_size}
+
+
+# number of leading batch means whose deletion minimizes the MSER statistic
+# (at least two batch means are kept)
+def mser_truncation(means):
+    z = np.asarray(means, dtype=float)
+    z = z - z.mean()
+    # sums over the batches d..n-1 for every d
+    remaining = np.arange(len(z), 0, -1)
+    sums = np.cumsum(z[::-1])[::-1]
+    squares = np.cumsum((z * z)[::-1])[::-1]
+    mser = (squares - sums * sums / remaining) / (remaining * remaining)
+    return int(np.argmin(mser[:-1]))
+
+
+# run replications until the relative precision is reached (or num_replications
+# were made); run_once(i) returns the output of replication i
+def replicate(run_once, num_replications, rel_precision=None, level=0.95, min_replications=10):
+    stat = RunningStat()
+    stop = SequentialStop(rel_precision, level, min_replications) if rel_precision is not None else None
+    for i in range(num_replications):
+        stat.add(run_once(i))
+        if stop is not None and stop.satisfied(stat):
+            break
+    return stat.interval(level)
+
+
+# p-quantile of the Student t distribution with df degrees of freedom
+@lru_cache(maxsize=None)
+def t_quantile(p, df):
+    if p < 0.5:
+        return -t_quantile(1.0 - p, df)
+    # bisection on the upper tail probability, which decreases in t
+    tail = 1.0 - p
+    low, high = 0.0, 1.0
+    while _t_upper_tail(high, df) > tail:
+        high *= 2.0
+    for _ in range(100):
+        mid = (low + high) / 2.0
+        if _t_upper_tail(mid, df) > tail:
+            low = mid
+        else:
+            high = mid
+    return (low + high) / 2.0
+
+
+# P(T > t) for t >= 0
+def _t_upper_tail(t, df):
+    return 0.5 * _betainc(df / 2.0, 0.5, df / (df + t * t))
+
+
+# regularized incomplete beta function I_x(a, b)
+def _betainc(a, b, x):
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log(1.0 - x))
+    # the continued fraction converges fast for x < (a + 1) / (a + b + 2)
+    if x < (a + 1.0) / (a + b + 2.0):
+        return front * _betacf(a, b, x) / a
+    return 1.0 - front * _betacf(b, a, 1.0 - x) / b
+
+
+# continued fraction of the incomplete beta function (modified Lentz)
+def _betacf(a, b, x):
+    tiny = 1.0e-300
+    c = 1.0
+    d = 1.0 - (a + b) * x / (a + 1.0)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, 300):
+        for numerator in (m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+                          -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))):
+            d = 1.0 + numerator * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            h *= d * c
+        if abs(d * c - 1.0) < 1.0e-15:
+            break
+    return h
@@ -0,0 +1,278 @@
+# Long-lived simulation service: JSON-lines jobs in, results streamed out.
+#
+#     python -m simkernel.service [--socket PATH] [--workers N] [--max-pending N]
+#
+# Jobs are read one per line from stdin (or from every client of a Unix
+# socket), and the messages are written one per line to stdout (or back to
+# the client).  The models are imported once by every worker of a process
+# pool that lives as long as the service, so a job pays neither interpreter
+# start-up nor imports nor in.txt/out.txt round trips.
+#
+# A job is
+#     {"id": "a", "model": "queue", "replications": 3, "seed": 1973272912,
+#      "point": {"mean_interarrival": 1.0, "mean_service": 0.5, "num_delays_required": 1000}}
+# model is a key of MODELS and point is the input of its sweep task (for
+# "inventory" the InventorySystem constructor arguments except numPolicy).
+# replications (default 1) and seed (default: the Lcgrand seed of stream 1,
+# else an integer in [1, MODLUS - 1]) are optional; replication i runs on
+# substream i of the seed (see Lcgrand.lcgrand_spawn), which gives all the
+# streams of the replication, each of which may draw up to SUBSTREAM_LENGTH
+# numbers.  id defaults to the line number.
+#
+# Every replication is written as soon as it finishes, in any order:
+#     {"id": "a", "replication": 2, "result": {...}}
+#     {"id": "a", "replication": 0, "error": "ValueError: ..."}
+# followed by {"id": "a", "done": true, "replications": 3, "errors": 0} once
+# all of them are written.  A line that is not a valid job, or that is
+# longer than the read limit of a socket client, gets
+#     {"id": null, "line": 7, "error": "..."}
+# If a worker dies, the replications queued in its pool fail with
+# BrokenProcessPool and the next ones go to a new process pool.
+#
+# Backpressure: at most max_pending replications are queued, running or
+# being written at a time, and the next line of a client is not read until
+# one of them is free.  A producer faster than the pool is held back by its
+# full pipe or socket, and a consumer that reads slowly holds the service
+# back through the writes it waits for.
+
+import argparse
+import asyncio
+import importlib
+import json
+import multiprocessing
+import os
+import signal
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .lcg_rand import Lcgrand
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# model name -> (Offline directory, module, sweep task(point, seeds))
+MODELS = {
+    'queue': ('Offline1', 'single_server_queueing_system', 'run_point'),
+    'lindley': ('Offline1', 'lindley_queue', 'run_point'),
+    'inventory': ('Offline2', 'inventory_system', 'runScenario'),
+}
+
+# tasks imported by this worker process
+_tasks = {}
+
+
+def _load(model):
+    if model not in _tasks:
+        directory, module, task = MODELS[model]
+        path = os.path.join(ROOT_DIR, directory)
+        if path not in sys.path:
+            sys.path.append(path)
+        _tasks[model] = getattr(importlib.import_module(module), task)
+    return _tasks[model]
+
+
+# initializer of every worker: import all the models before the first job
+def _warm_up():
+    for model in MODELS:
+        _load(model)
+
+
+def _run(model, point, seeds):
+    return _load(model)(point, seeds)
+
+
+# A pool of workers started by fresh interpreters: a forked worker would
+# inherit the sockets of the clients connected at the time (a pool is
+# replaced while they are) and keep them open after the service closes them.
+def _pool(num_workers):
+    return ProcessPoolExecutor(num_workers, mp_context=multiprocessing.get_context('spawn'), initializer=_warm_up)
+
+
+# a job dict with every field filled in; raises ValueError if line is not a job
+def parse_job(line, number):
+    job = json.loads(line)
+    if not isinstance(job, dict):
+        raise ValueError('a job must be a JSON object')
+    if job.get('model') not in MODELS:
+        raise ValueError('model must be one of: %s' % ', '.join(MODELS))
+    if not isinstance(job.get('point'), dict):
+        raise ValueError('point must be a JSON object')
+    replications = job.get('replications', 1)
+    if not isinstance(replications, int) or isinstance(replications, bool) or replications < 1:
+        raise ValueError('replications must be a positive integer')
+    if 'seeds' in job:
+        # every stream of a replication comes from the one seed
+        raise ValueError('seeds is not a job field; give the single seed instead')
+    default = Lcgrand()
+    seed = job.get('seed', default.lcgrandgt(1))
+    # a seed outside [1, MODLUS - 1] gives a stream of zeros or of out-of-range numbers
+    if not isinstance(seed, int) or isinstance(seed, bool) or not 1 <= seed < default.MODLUS:
+        raise ValueError('seed must be an integer in [1, %d], got %r' % (default.MODLUS - 1, seed))
+    return {'id': job.get('id', number), 'model': job['model'], 'point': job['point'], 'replications': replications, 'seed': seed}
+
+
+# seeds of replication i of a job: substream i of its seed
+def replication_seeds(seed, replication):
+    return Lcgrand().lcgrand_spawn(seed, replication).zrng
+
+
+class JobServer:
+    def __init__(self, num_workers=None, max_pending=None):
+        self.num_workers = num_workers or os.cpu_count()    # worker processes
+        self.max_pending = max_pending or 2 * self.num_workers  # replications in flight
+        self.executor = None
+        self.slots = None                   # semaphore of the replications in flight
+        self.line_limit = 1 << 20           # longest line a socket client may send
+
+    def start(self):
+        self.executor = _pool(self.num_workers)
+        # make every worker import the models now instead of at the first job
+        for future in [self.executor.submit(_warm_up) for _ in range(self.num_workers)]:
+            future.result()
+        self.slots = asyncio.Semaphore(self.max_pending)
+
+    def stop(self):
+        self.executor.shutdown()
+
+    def __restart__(self, broken):
+        # a worker died (killed, out of memory, ...) and took the pool with
+        # it; the first replication to notice replaces the pool
+        if self.executor is broken:
+            self.executor = _pool(self.num_workers)
+            broken.shutdown(wait=False)
+
+    # run the jobs of the lines that read_line returns until it returns b''
+    # (end of input); write is a coroutine function sending one message
+    async def handle(self, read_line, write):
+        jobs = set()
+        number = 0
+        while True:
+            try:
+                line = await read_line()
+            except ValueError as error:
+                # the line was skipped (too long); go on with the next one
+                number += 1
+                await write({'id': None, 'line': number, 'error': str(error)})
+                continue
+            if not line:
+                break
+            number += 1
+            if not line.strip():
+                continue
+            try:
+                job = parse_job(line, number)
+            except ValueError as error:
+                await write({'id': None, 'line': number, 'error': str(error)})
+                continue
+            replications = []
+            for replication in range(job['replications']):
+                await self.slots.acquire()
+                replications.append(asyncio.create_task(self.__replicate__(job, replication, write)))
+            task = asyncio.create_task(self.__finish__(job, replications, write))
+            jobs.add(task)
+            task.add_done_callback(jobs.discard)
+        await asyncio.gather(*jobs)
+
+    async def __replicate__(self, job, replication, write):
+        # holds one slot until its message is written
+        try:
+            executor = self.executor
+            try:
+                seeds = replication_seeds(job['seed'], replication)
+                result = await asyncio.get_running_loop().run_in_executor(executor, _run, job['model'], job['point'], seeds)
+                message = {'id': job['id'], 'replication': replication, 'result': result}
+            except Exception as error:
+                if isinstance(error, BrokenProcessPool):
+                    self.__restart__(executor)
+                message = {'id': job['id'], 'replication': replication, 'error': '%s: %s' % (type(error).__name__, error)}
+            await write(message)
+            return 'error' not in message
+        finally:
+            self.slots.release()
+
+    async def __finish__(self, job, replications, write):
+        succeeded = await asyncio.gather(*replications)
+        await write({'id': job['id'], 'done': True, 'replications': len(succeeded), 'errors': succeeded.count(False)})
+
+    async def serve_stdio(self):
+        loop = asyncio.get_running_loop()
+
+        async def read_line():
+            # a blocking read in a thread works for pipes, terminals and files alike
+            return await loop.run_in_executor(None, sys.stdin.buffer.readline)
+
+        async def write(message):
+            sys.stdout.write(json.dumps(message) + '\n')
+            sys.stdout.flush()
+
+        self.start()
+        try:
+            await self.handle(read_line, write)
+        finally:
+            self.stop()
+
+    # serve the clients of a Unix socket until SIGINT or SIGTERM
+    async def serve_socket(self, path):
+        loop = asyncio.get_running_loop()
+        stopped = asyncio.Event()
+        self.start()
+        try:
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(signum, stopped.set)
+            server = await asyncio.start_unix_server(self.__client__, path, limit=self.line_limit)
+            async with server:
+                await stopped.wait()
+        finally:
+            self.stop()
+            if os.path.exists(path):
+                os.remove(path)
+
+    async def __client__(self, reader, writer):
+        async def write(message):
+            writer.write((json.dumps(message) + '\n').encode())
+            await writer.drain()
+
+        async def read_line():
+            # like reader.readline, but a line longer than the limit is
+            # skipped up to its newline and reported with ValueError
+            try:
+                return await reader.readuntil(b'\n')
+            except asyncio.IncompleteReadError as error:
+                return error.partial        # last line without a newline, or b'' at the end
+            except asyncio.LimitOverrunError as error:
+                skipped = error.consumed
+            while True:
+                try:
+                    await reader.readexactly(skipped)
+                    await reader.readuntil(b'\n')
+                    break
+                except asyncio.LimitOverrunError as error:
+                    skipped = error.consumed
+                except asyncio.IncompleteReadError:
+                    break
+            raise ValueError('line longer than %d bytes' % self.line_limit)
+
+        try:
+            await self.handle(read_line, write)
+        except ConnectionError:
+            pass        # the client went away; its remaining results are dropped
+        finally:
+            writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulation service: JSON-lines jobs in, results streamed out')
+    parser.add_argument('--socket', help='listen on this Unix socket instead of reading stdin')
+    parser.add_argument('--workers', type=int, help='worker processes (default: number of CPUs)')
+    parser.add_argument('--max-pending', type=int, help='replications in flight before input is held back (default: 2 per worker)')
+    args = parser.parse_args()
+
+    server = JobServer(args.workers, args.max_pending)
+    try:
+        asyncio.run(server.serve_socket(args.socket) if args.socket else server.serve_stdio())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
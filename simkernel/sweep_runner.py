@@ -0,0 +1,77 @@
+# Parameter sweeps with an on-disk result cache.
+#
+# run_sweep(task, points) runs task(point, seeds) for every point of a grid
+# on a process pool.  A point is a JSON-serializable dict of model inputs,
+# seeds is the list of Lcgrand seeds (zrng) every run starts from, and the
+# task returns a JSON-serializable result.
+#
+# Results are stored in a content-addressed cache: the file name is the
+# SHA-256 of the task name, the point and the seeds.  Re-running a sweep
+# after adding grid points only computes the new points.  Delete the cache
+# directory after changing a model, since the key does not cover the code.
+#
+#     from single_server_queueing_system import run_point
+#     points = grid(mean_interarrival=[1.0, 1.1, 1.2], mean_service=[0.5, 0.9], num_delays_required=[1000])
+#     results = run_sweep(run_point, points)
+#
+# The inventory model's task is inventory_system.runScenario.
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+
+from .lcg_rand import Lcgrand
+
+CACHE_DIR = '.sweep_cache'
+
+
+# every combination of the axis values, as a list of dicts
+def grid(**axes):
+    names = list(axes)
+    return [dict(zip(names, values)) for values in product(*axes.values())]
+
+
+def cache_key(task, point, seeds):
+    text = json.dumps({'task': task.__module__ + '.' + task.__qualname__, 'point': point, 'seeds': seeds}, sort_keys=True)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def cache_path(cache_dir, key):
+    return os.path.join(cache_dir, key[:2], key + '.json')
+
+
+# results of task for every point, in the order of points
+def run_sweep(task, points, seeds=None, cache_dir=CACHE_DIR, num_workers=None):
+    seeds = list(Lcgrand().zrng) if seeds is None else list(seeds)
+    results = [None] * len(points)
+    missing = {}        # index of a point -> its cache path
+
+    for i, point in enumerate(points):
+        path = cache_path(cache_dir, cache_key(task, point, seeds))
+        if os.path.exists(path):
+            with open(path, 'r') as cache_file:
+                results[i] = json.load(cache_file)
+        else:
+            missing[i] = path
+
+    if missing:
+        with ProcessPoolExecutor(num_workers) as executor:
+            futures = {executor.submit(task, points[i], seeds): i for i in missing}
+            # store every result as soon as it is done, so an interrupted
+            # sweep keeps the points it already finished
+            for future in as_completed(futures):
+                i = futures[future]
+                results[i] = future.result()
+                _store(missing[i], results[i])
+
+    return results
+
+
+def _store(path, result):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w') as cache_file:
+        json.dump(result, cache_file)
+    os.replace(temp_path, path)